@@ -1,14 +1,41 @@
 from abc import ABC, abstractmethod
-from llm.client import LLMClient
+from llm.client import get_llm_client
 
 class BaseAgent(ABC):
     def __init__(self, use_mock: bool = False):
-        if use_mock:
-            from llm.client import MockLLMClient
-            self.llm = MockLLMClient()
-        else:
-            self.llm = LLMClient()
+        self.use_mock = use_mock
+        # All agents share one pooled client per provider/model instead of building their own.
+        self.llm = get_llm_client(use_mock)
+
+    @property
+    def allm(self):
+        """The shared async client for the running event loop."""
+        # Imported on first use: sync runs never need asyncio or the async client.
+        from llm.async_client import get_async_llm_client
+        return get_async_llm_client(self.use_mock)
+
+    def call_json(self, system_prompt: str, user_prompt: str, stream_key: str = None, on_text=None, stream_stats: dict = None, **kwargs) -> dict:
+        """Calls the LLM for JSON; with `on_text`, the `stream_key` value is streamed to it as it is generated."""
+        if on_text is not None:
+            return self.llm.call_expecting_json_stream(system_prompt, user_prompt, stream_key, on_text, stats=stream_stats, **kwargs)
+        return self.llm.call_expecting_json(system_prompt, user_prompt, **kwargs)
+
+    async def acall_json(self, system_prompt: str, user_prompt: str, **kwargs) -> dict:
+        return await self.allm.call_expecting_json(system_prompt, user_prompt, **kwargs)
+
+    @staticmethod
+    def with_feedback(user_prompt: str, feedback=None) -> str:
+        """Appends the problems found in a rejected previous answer, so a re-request can correct them."""
+        if not feedback:
+            return user_prompt
+        problems = "\n".join(f"- {problem}" for problem in feedback)
+        return f"{user_prompt}\n\nYour previous answer was rejected by a static check:\n{problems}\nReturn a corrected version."
 
     @abstractmethod
     def run(self, *args, **kwargs):
         pass
+
+    async def arun(self, *args, **kwargs):
+        """Async version of `run`. Agents override it to use the async client; by default `run` goes to a thread."""
+        import asyncio
+        return await asyncio.to_thread(self.run, *args, **kwargs)
@@ -2,12 +2,19 @@ from agents.base import BaseAgent
 from schemas import PlannerSpec, CoderOutput
 
 class CoderAgent(BaseAgent):
-    def run(self, spec: PlannerSpec) -> CoderOutput:
+    def _prompts(self, spec: PlannerSpec, inject_bug: bool = True, feedback=None):
+        if inject_bug:
+            task = (
+                "HOWEVER, you must introduce a SUBTLE BUG in the logic. The bug should not be a syntax error, but a logic error "
+                "(e.g., off-by-one, inverted condition, wrong variable usage).\n"
+                "The code must otherwise be clean, runnable, and use the exact function name and inputs from the spec.\n"
+            )
+        else:
+            # The bug is injected locally afterwards (see utils/mutation.py)
+            task = "The code must be correct, clean, runnable, and use the exact function name and inputs from the spec.\n"
         system_prompt = (
             "You are a Senior Python Developer. Your task is to write a Python file based EXACTLY on the provided specification.\n"
-            "HOWEVER, you must introduce a SUBTLE BUG in the logic. The bug should not be a syntax error, but a logic error "
-            "(e.g., off-by-one, inverted condition, wrong variable usage).\n"
-            "The code must otherwise be clean, runnable, and use the exact function name and inputs from the spec.\n"
+            + task +
             "Output JSON with a single key 'file_content' containing the Python code.\n"
             "Example:\n"
             "{\n"
@@ -22,7 +29,15 @@ class CoderAgent(BaseAgent):
             f"Steps: {json.dumps(spec.steps)}"
         )
         
-        response = self.llm.call_expecting_json(system_prompt, user_prompt)
+        return system_prompt, self.with_feedback(user_prompt, feedback)
+
+    def run(self, spec: PlannerSpec, on_content=None, stream_stats: dict = None, inject_bug: bool = True, feedback=None) -> CoderOutput:
+        system_prompt, user_prompt = self._prompts(spec, inject_bug, feedback)
+        response = self.call_json(system_prompt, user_prompt, "file_content", on_content, stream_stats)
+        return CoderOutput(**response)
+
+    async def arun(self, spec: PlannerSpec, inject_bug: bool = True, feedback=None) -> CoderOutput:
+        response = await self.acall_json(*self._prompts(spec, inject_bug, feedback))
         return CoderOutput(**response)
 
 import json
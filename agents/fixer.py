@@ -1,9 +1,18 @@
 from agents.base import BaseAgent
-from schemas import PlannerSpec, FixerOutput
+from schemas import PlannerSpec, FixerOutput, FixerPatchOutput
 import json
 
 class FixerAgent(BaseAgent):
-    def run(self, spec: PlannerSpec, current_code: str, test_output: str) -> FixerOutput:
+    def _user_prompt(self, spec: PlannerSpec, current_code: str, test_output: str) -> str:
+        return (
+            f"Spec: {spec.description}\n"
+            f"Function: {spec.function_name}\n"
+            f"Logic: {json.dumps(spec.steps)}\n\n"
+            f"Current Code:\n```python\n{current_code}\n```\n\n"
+            f"Test Output:\n{test_output}"
+        )
+
+    def _prompts(self, spec: PlannerSpec, current_code: str, test_output: str, hint: str = None, feedback=None):
         system_prompt = (
             "You are a Senior Python Developer. Your task is to FIX a bug in the provided code.\n"
             "You have the original specification, the current buggy code, and the test failure output.\n"
@@ -15,14 +24,45 @@ class FixerAgent(BaseAgent):
             "  \"file_content\": \"def foo():\\n    # fixed logic...\"\n"
             "}"
         )
+        if hint:
+            # Candidate fixes are steered towards different strategies
+            system_prompt += f"\nStrategy: {hint}"
         
-        user_prompt = (
-            f"Spec: {spec.description}\n"
-            f"Function: {spec.function_name}\n"
-            f"Logic: {json.dumps(spec.steps)}\n\n"
-            f"Current Code:\n```python\n{current_code}\n```\n\n"
-            f"Test Output:\n{test_output}"
+        return system_prompt, self.with_feedback(self._user_prompt(spec, current_code, test_output), feedback)
+
+    def _patch_prompts(self, spec: PlannerSpec, current_code: str, test_output: str, hint: str = None, feedback=None):
+        system_prompt = (
+            "You are a Senior Python Developer. Your task is to FIX a bug in the provided code.\n"
+            "You have the original specification, the current buggy code, and the test failure output.\n"
+            "YOU MUST NOT CHANGE the function signature (name, arguments) or the file name.\n"
+            "Analyze the test failure to understand the logic error.\n"
+            "Do NOT return the whole file. Output JSON with 'edits': a list of SEARCH/REPLACE edits.\n"
+            "Each 'search' must be copied EXACTLY from the current code (including indentation) and match exactly once; "
+            "keep it as short as possible while unique. 'replace' is the new text for that block.\n"
+            "Example:\n"
+            "{\n"
+            "  \"edits\": [{\"search\": \"    if n == 0:\\n        return 0\", \"replace\": \"    if n == 0:\\n        return 1\"}]\n"
+            "}"
         )
-        
-        response = self.llm.call_expecting_json(system_prompt, user_prompt)
+        if hint:
+            system_prompt += f"\nStrategy: {hint}"
+
+        return system_prompt, self.with_feedback(self._user_prompt(spec, current_code, test_output), feedback)
+
+    def run(self, spec: PlannerSpec, current_code: str, test_output: str, temperature: float = 0.0, hint: str = None, on_content=None, stream_stats: dict = None, feedback=None) -> FixerOutput:
+        system_prompt, user_prompt = self._prompts(spec, current_code, test_output, hint, feedback)
+        response = self.call_json(system_prompt, user_prompt, "file_content", on_content, stream_stats, temperature=temperature)
         return FixerOutput(**response)
+
+    async def arun(self, spec: PlannerSpec, current_code: str, test_output: str, temperature: float = 0.0, hint: str = None, feedback=None) -> FixerOutput:
+        response = await self.acall_json(*self._prompts(spec, current_code, test_output, hint, feedback), temperature=temperature)
+        return FixerOutput(**response)
+
+    def run_patch(self, spec: PlannerSpec, current_code: str, test_output: str, temperature: float = 0.0, hint: str = None, feedback=None) -> FixerPatchOutput:
+        """Asks for SEARCH/REPLACE edits instead of the whole file, so far fewer output tokens are generated."""
+        response = self.llm.call_expecting_json(*self._patch_prompts(spec, current_code, test_output, hint, feedback), temperature=temperature)
+        return FixerPatchOutput(**response)
+
+    async def arun_patch(self, spec: PlannerSpec, current_code: str, test_output: str, temperature: float = 0.0, hint: str = None, feedback=None) -> FixerPatchOutput:
+        response = await self.acall_json(*self._patch_prompts(spec, current_code, test_output, hint, feedback), temperature=temperature)
+        return FixerPatchOutput(**response)
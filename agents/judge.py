@@ -1,8 +1,28 @@
 from agents.base import BaseAgent
-from schemas import JudgeOutput
+from schemas import JudgeOutput, TestRunResult
+from utils.test_results import judge_results
+from utils.failure_summary import summarize_failures
 
 class JudgeAgent(BaseAgent):
-    def run(self, test_output: str) -> JudgeOutput:
+    def __init__(self, use_mock: bool = False, llm_fallback: bool = True, prompt_budget: int = None):
+        super().__init__(use_mock=use_mock)
+        self.llm_fallback = llm_fallback
+        # Token budget for the compacted pytest output sent to the LLM; None sends it raw.
+        self.prompt_budget = prompt_budget
+
+    def judge(self, result: TestRunResult) -> JudgeOutput:
+        """Judges a structured test run locally, only asking the LLM when the outcome is ambiguous."""
+        verdict = judge_results(result)
+        if verdict is not None:
+            return verdict
+        if self.llm_fallback:
+            output = result.output
+            if self.prompt_budget:
+                output = summarize_failures(output, token_budget=self.prompt_budget)
+            return self.run(output)
+        return JudgeOutput(success=False, reason=f"Ambiguous pytest run (exit code {result.exit_code}).")
+
+    def _prompts(self, test_output: str):
         system_prompt = (
             "You are a CI/CD Judge. Analyze the pytest output to determine if the tests PASSED or FAILED.\n"
             "Success = All tests passed, no errors.\n"
@@ -15,6 +35,12 @@ class JudgeAgent(BaseAgent):
         )
         
         user_prompt = f"Pytest Output:\n{test_output}"
-        
-        response = self.llm.call_expecting_json(system_prompt, user_prompt)
+        return system_prompt, user_prompt
+
+    def run(self, test_output: str) -> JudgeOutput:
+        response = self.llm.call_expecting_json(*self._prompts(test_output))
+        return JudgeOutput(**response)
+
+    async def arun(self, test_output: str) -> JudgeOutput:
+        response = await self.acall_json(*self._prompts(test_output))
         return JudgeOutput(**response)
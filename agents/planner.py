@@ -3,7 +3,7 @@ from agents.base import BaseAgent
 from schemas import PlannerSpec
 
 class PlannerAgent(BaseAgent):
-    def run(self, user_goal: str) -> PlannerSpec:
+    def _prompts(self, user_goal: str):
         system_prompt = (
             "You are a Senior Software Architect. Your job is to break down a user request into a precise "
             "single-file Python module specification.\n"
@@ -22,9 +22,15 @@ class PlannerAgent(BaseAgent):
         )
         
         user_prompt = f"Goal: {user_goal}"
-        
+        return system_prompt, user_prompt
+
+    def run(self, user_goal: str) -> PlannerSpec:
         # We use the LLM to get the dict, then validate with Pydantic
-        response_dict = self.llm.call_expecting_json(system_prompt, user_prompt)
+        response_dict = self.llm.call_expecting_json(*self._prompts(user_goal))
         
         # Basic validation and type conversion
         return PlannerSpec(**response_dict)
+
+    async def arun(self, user_goal: str) -> PlannerSpec:
+        response_dict = await self.acall_json(*self._prompts(user_goal))
+        return PlannerSpec(**response_dict)
@@ -3,7 +3,7 @@ from schemas import PlannerSpec, TesterOutput
 import os
 
 class TesterAgent(BaseAgent):
-    def run(self, spec: PlannerSpec) -> TesterOutput:
+    def _prompts(self, spec: PlannerSpec, feedback=None):
         # We need to make sure the test imports the right file.
         # Implied assumption: The file will be in the same directory or accessible path.
         # We will assume the orchestrator places them in the same workspace.
@@ -29,6 +29,14 @@ class TesterAgent(BaseAgent):
             f"Logic Steps: {json.dumps(spec.steps)}"
         )
         
-        response = self.llm.call_expecting_json(system_prompt, user_prompt)
+        return system_prompt, self.with_feedback(user_prompt, feedback)
+
+    def run(self, spec: PlannerSpec, on_content=None, stream_stats: dict = None, feedback=None) -> TesterOutput:
+        system_prompt, user_prompt = self._prompts(spec, feedback)
+        response = self.call_json(system_prompt, user_prompt, "test_content", on_content, stream_stats)
+        return TesterOutput(**response)
+
+    async def arun(self, spec: PlannerSpec, feedback=None) -> TesterOutput:
+        response = await self.acall_json(*self._prompts(spec, feedback))
         return TesterOutput(**response)
 import json
@@ -0,0 +1,113 @@
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, TextIO
+
+from utils.stats import percentile
+from utils.test_runner import PytestWorker
+
+logger = logging.getLogger("Batch")
+
+def read_goals(source: TextIO) -> List[dict]:
+    """Reads JSONL goals: one {"goal": "...", "id": optional} object (or bare JSON string) per line."""
+    goals = []
+    for line_no, line in enumerate(source, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        item = json.loads(line)
+        if isinstance(item, str):
+            item = {"goal": item}
+        if not item.get("goal"):
+            raise ValueError(f"Line {line_no}: missing 'goal'")
+        item.setdefault("id", str(len(goals)))
+        goals.append(item)
+    return goals
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")[:40] or "goal"
+
+async def run_batch(
+    goals: Iterable[dict],
+    make_orchestrator: Callable,
+    concurrency: int,
+    batch_dir: str,
+    out: TextIO = sys.stdout,
+    warm_tests: bool = True,
+) -> dict:
+    """
+    Runs many orchestrations at once and streams one JSON result line per goal as it finishes.
+
+    LLM-bound work runs on asyncio (each orchestration in a thread from a pool of
+    `concurrency` threads; the loop's default executor would cap this at
+    min(32, cpus + 4)); pytest runs go to a shared pool of warm worker
+    processes. Every goal gets an isolated workspace under `batch_dir`.
+    `make_orchestrator(work_dir=..., test_worker=...)` builds one orchestrator per goal.
+    """
+    goals = list(goals)
+    semaphore = asyncio.Semaphore(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch")
+    worker = PytestWorker(max_workers=concurrency) if warm_tests else None
+    latencies = []
+    succeeded = 0
+    cycles_avoided = 0
+
+    async def run_one(index: int, item: dict):
+        nonlocal succeeded, cycles_avoided
+        async with semaphore:
+            work_dir = os.path.join(batch_dir, f"{index:04d}_{_slug(item['goal'])}")
+            orchestrator = make_orchestrator(work_dir=work_dir, test_worker=worker)
+            start = time.perf_counter()
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(executor, orchestrator.start, item["goal"])
+                record = result.model_dump()
+            except Exception as e:
+                logger.error(f"Goal {item['id']} crashed: {e}")
+                record = {"goal": item["goal"], "success": False, "reason": f"{type(e).__name__}: {e}", "work_dir": work_dir}
+            finally:
+                orchestrator.close()
+            latency = time.perf_counter() - start
+
+        latencies.append(latency)
+        succeeded += bool(record["success"])
+        cycles_avoided += record.get("preflight_stats", {}).get("cycles_avoided", 0)
+        record = {"id": item["id"], **record, "latency": round(latency, 3)}
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(run_one(i, item) for i, item in enumerate(goals)))
+    finally:
+        executor.shutdown(wait=False)
+        if worker:
+            worker.close()
+        if "llm.async_client" in sys.modules:
+            # Only loaded if an agent's `arun` ran; close the async clients it opened on this loop.
+            await sys.modules["llm.async_client"].aclose_async_llm_clients()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "goals": len(goals),
+        "succeeded": succeeded,
+        "concurrency": concurrency,
+        "elapsed": elapsed,
+        "goals_per_minute": len(goals) / elapsed * 60 if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "cycles_avoided": cycles_avoided,
+    }
+
+def format_summary(summary: dict) -> str:
+    return (
+        f"{summary['succeeded']}/{summary['goals']} goals succeeded in {summary['elapsed']:.1f}s "
+        f"at concurrency {summary['concurrency']}: {summary['goals_per_minute']:.1f} goals/min, "
+        f"latency p50 {summary['p50']:.1f}s / p95 {summary['p95']:.1f}s / p99 {summary['p99']:.1f}s, "
+        f"{summary['cycles_avoided']} test/fix cycles avoided by pre-flight checks"
+    )
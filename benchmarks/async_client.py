@@ -0,0 +1,87 @@
+"""
+Fan-out of concurrent LLM calls: sync sequential vs thread pool vs the async client.
+
+Offline, MockLLMClient / AsyncMockLLMClient simulate `--latency` seconds (plus
+up to `--jitter`) per call. Each mode issues `--calls` Planner requests; the
+async mode is run once per `--concurrency` value (the client's semaphore size).
+With `--live`, the same fan-out goes to the configured provider.
+
+    python -m benchmarks.async_client --calls 64 --latency 0.25 --concurrency 8 32 64
+    python -m benchmarks.async_client --live --calls 8 --concurrency 4 8
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.planner import PlannerAgent
+from llm.async_client import AsyncMockLLMClient, AsyncLLMClient, set_async_llm_client
+from llm.client import MockLLMClient
+
+GOAL = "Write a function that returns the factorial of n."
+
+def measure(label: str, run, calls: int):
+    tracemalloc.start()
+    threads_before = threading.active_count()
+    start = time.perf_counter()
+    peak_threads = run()
+    elapsed = time.perf_counter() - start
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} {elapsed:7.2f}s  {calls / elapsed:7.1f} calls/s  "
+          f"{max(peak_threads, threads_before):3d} threads  {peak_memory / 1024:8.0f} KiB peak")
+
+def run_sequential(agent: PlannerAgent, calls: int):
+    for _ in range(calls):
+        agent.run(GOAL)
+    return threading.active_count()
+
+def run_threads(agent: PlannerAgent, calls: int, workers: int):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(agent.run, GOAL) for _ in range(calls)]
+        peak = threading.active_count()
+        for future in futures:
+            future.result()
+    return peak
+
+def run_async(agent: PlannerAgent, calls: int, make_client):
+    async def fan_out():
+        # A fresh client per run, so each gets its own semaphore size.
+        async with make_client() as client:
+            set_async_llm_client(client)
+            await asyncio.gather(*(agent.arun(GOAL) for _ in range(calls)))
+        return threading.active_count()
+    return asyncio.run(fan_out())
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs threaded vs async LLM fan-out")
+    parser.add_argument("--calls", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.25, help="Simulated seconds per call.")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Extra random simulated seconds per call.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32, 64], help="Async semaphore sizes (and thread pool sizes) to try.")
+    parser.add_argument("--live", action="store_true", help="Call the configured provider instead of the mocks.")
+    args = parser.parse_args()
+
+    agent = PlannerAgent(use_mock=not args.live)
+    if not args.live:
+        agent.llm = MockLLMClient(latency=args.latency + args.jitter / 2)
+    print(f"{args.calls} Planner calls, {'live provider' if args.live else f'{args.latency:.2f}s simulated latency'}")
+
+    with contextlib.redirect_stderr(io.StringIO()):
+        if args.live or args.calls * args.latency <= 30:
+            measure("sync sequential", lambda: run_sequential(agent, args.calls), args.calls)
+        for n in args.concurrency:
+            measure(f"threads x{n}", lambda: run_threads(agent, args.calls, n), args.calls)
+        for n in args.concurrency:
+            if args.live:
+                make_client = lambda: AsyncLLMClient(max_concurrency=n)
+            else:
+                make_client = lambda: AsyncMockLLMClient(latency=args.latency, jitter=args.jitter, max_concurrency=n)
+            measure(f"async semaphore {n}", lambda: run_async(agent, args.calls, make_client), args.calls)
+
+if __name__ == "__main__":
+    main()
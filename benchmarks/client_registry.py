@@ -0,0 +1,125 @@
+"""
+Micro-benchmark: one LLMClient per agent vs. the shared client registry.
+
+Simulates many orchestrations in one process (5 agents each) and reports
+construction time and per-call overhead against a local keep-alive stub,
+so no API quota is used.
+
+    python -m benchmarks.client_registry --runs 50
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+AGENTS_PER_RUN = 5
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({
+            "id": "stub", "object": "chat.completion", "created": 0, "model": "stub",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "{}"}}],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def bench_construction(runs: int):
+    from llm.client import LLMClient, get_llm_client, reset_llm_clients
+
+    def per_agent():
+        for _ in range(runs):
+            [LLMClient() for _ in range(AGENTS_PER_RUN)]
+
+    def shared():
+        reset_llm_clients()
+        for _ in range(runs):
+            [get_llm_client() for _ in range(AGENTS_PER_RUN)]
+
+    with contextlib.redirect_stderr(io.StringIO()):
+        return _timed(per_agent), _timed(shared)
+
+def bench_openai_calls(runs: int):
+    from llm.client import LLMClient, get_llm_client, reset_llm_clients
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+
+    def per_agent():
+        for _ in range(runs):
+            for client in [LLMClient() for _ in range(AGENTS_PER_RUN)]:
+                client.call("system", "user")
+
+    def shared():
+        reset_llm_clients()
+        for _ in range(runs):
+            for client in [get_llm_client() for _ in range(AGENTS_PER_RUN)]:
+                client.call("system", "user")
+
+    try:
+        with contextlib.redirect_stderr(io.StringIO()):
+            return _timed(per_agent), _timed(shared)
+    finally:
+        server.shutdown()
+
+def bench_gemini_model(runs: int):
+    from llm.client import LLMClient
+
+    with contextlib.redirect_stderr(io.StringIO()):
+        client = LLMClient()
+    calls = runs * AGENTS_PER_RUN
+    rebuilt = _timed(lambda: [client.client.GenerativeModel(client.model) for _ in range(calls)])
+    cached = _timed(lambda: [client._get_gemini_model() for _ in range(calls)])
+    return rebuilt, cached
+
+def _report(label: str, before: float, after: float, count: int):
+    speedup = before / after if after else float("inf")
+    print(f"{label:<28} {before / count * 1e3:>10.3f} ms {after / count * 1e3:>10.3f} ms {speedup:>8.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared LLM client registry benchmark")
+    parser.add_argument("--runs", type=int, default=50, help="Number of simulated orchestrations.")
+    parser.add_argument("--provider", choices=["openai", "gemini"], default="openai")
+    args = parser.parse_args()
+
+    # Dummy keys are enough: nothing here talks to a real provider.
+    os.environ.pop("GEMINI_API_KEY" if args.provider == "openai" else "OPENAI_API_KEY", None)
+    key_var = "OPENAI_API_KEY" if args.provider == "openai" else "GEMINI_API_KEY"
+    os.environ.setdefault(key_var, "sk-benchmark-0000000000")
+    # The stub reports no token usage, so the default limits would throttle the calls and
+    # this would time the shared rate limiter instead of the client. Set before any client
+    # is built: the limiter reads them once.
+    os.environ.setdefault("LLM_RPM", "1e9")
+    os.environ.setdefault("LLM_TPM", "1e12")
+
+    calls = args.runs * AGENTS_PER_RUN
+    print(f"{args.runs} orchestrations x {AGENTS_PER_RUN} agents ({args.provider})")
+    print(f"{'':<28} {'per-agent':>13} {'shared':>13} {'speedup':>9}")
+    _report("construction / agent", *bench_construction(args.runs), calls)
+    if args.provider == "openai":
+        _report("call overhead / call", *bench_openai_calls(args.runs), calls)
+    else:
+        _report("model setup / call", *bench_gemini_model(args.runs), calls)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Output tokens and fix-phase latency for full-file vs patch (search/replace) fixes.
+
+For each buggy/fixed pair in the corpus the patch is derived with `diff_to_edits`
+and checked to round-trip through `apply_edits`. Output tokens are estimated from
+the JSON each mode would return, and fix latency is modeled as
+time-to-first-token + output_tokens / decode rate, since decoding dominates the
+fix phase. `--live` asks the configured provider for both kinds of fix instead.
+
+    python -m benchmarks.fix_modes
+    python -m benchmarks.fix_modes --live
+"""
+import argparse
+import json
+import time
+
+from llm.rate_limit import estimate_tokens
+from schemas import PlannerSpec
+from utils.patching import apply_edits, diff_to_edits
+
+_HELPERS = '''
+
+def clamp(value, low, high):
+    """Restricts value to the closed interval [low, high]."""
+    if low > high:
+        raise ValueError("low must be <= high")
+    return max(low, min(value, high))
+
+def chunks(items, size):
+    """Splits items into lists of at most `size` elements."""
+    if size <= 0:
+        raise ValueError("size must be positive")
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def mean(values):
+    """Arithmetic mean of a non-empty sequence."""
+    if not values:
+        raise ValueError("mean of empty sequence")
+    return sum(values) / len(values)
+'''
+
+# (filename, function, buggy, fixed); the helpers pad each module to a realistic size.
+CORPUS = [
+    ("math_ops.py", "factorial", '''def factorial(n):
+    if n < 0:
+        raise ValueError("n must be >= 0")
+    if n == 0:
+        return 0
+    return n * factorial(n - 1)
+''' + _HELPERS, '''def factorial(n):
+    if n < 0:
+        raise ValueError("n must be >= 0")
+    if n == 0:
+        return 1
+    return n * factorial(n - 1)
+''' + _HELPERS),
+    ("search.py", "binary_search", '''def binary_search(items, target):
+    low, high = 0, len(items) - 1
+    while low < high:
+        mid = (low + high) // 2
+        if items[mid] == target:
+            return mid
+        if items[mid] < target:
+            low = mid + 1
+        else:
+            high = mid - 1
+    return -1
+''' + _HELPERS, '''def binary_search(items, target):
+    low, high = 0, len(items) - 1
+    while low <= high:
+        mid = (low + high) // 2
+        if items[mid] == target:
+            return mid
+        if items[mid] < target:
+            low = mid + 1
+        else:
+            high = mid - 1
+    return -1
+''' + _HELPERS),
+    ("strings.py", "is_palindrome", '''def is_palindrome(text):
+    cleaned = [c.lower() for c in text if c.isalnum()]
+    return cleaned == cleaned[1:][::-1]
+''' + _HELPERS, '''def is_palindrome(text):
+    cleaned = [c.lower() for c in text if c.isalnum()]
+    return cleaned == cleaned[::-1]
+''' + _HELPERS),
+    ("stats_ops.py", "median", '''def median(values):
+    ordered = sorted(values)
+    n = len(ordered)
+    if n == 0:
+        raise ValueError("median of empty sequence")
+    mid = n // 2
+    if n % 2:
+        return ordered[mid]
+    return (ordered[mid] + ordered[mid + 1]) / 2
+''' + _HELPERS, '''def median(values):
+    ordered = sorted(values)
+    n = len(ordered)
+    if n == 0:
+        raise ValueError("median of empty sequence")
+    mid = n // 2
+    if n % 2:
+        return ordered[mid]
+    return (ordered[mid - 1] + ordered[mid]) / 2
+''' + _HELPERS),
+    ("intervals.py", "merge_intervals", '''def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start < merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(pair) for pair in merged]
+''' + _HELPERS, '''def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(pair) for pair in merged]
+''' + _HELPERS),
+]
+
+def modeled_latency(tokens: int, ttft: float, decode_rate: float) -> float:
+    return ttft + tokens / decode_rate
+
+def run_offline(ttft: float, decode_rate: float):
+    print(f"{'file':<14} {'full tok':>8} {'patch tok':>9} {'saved':>6} {'full s':>7} {'patch s':>8}")
+    totals = [0, 0, 0.0, 0.0]
+    for filename, _, buggy, fixed in CORPUS:
+        edits = diff_to_edits(buggy, fixed)
+        assert apply_edits(buggy, edits, filename) == fixed, f"patch for {filename} does not round-trip"
+        full = estimate_tokens(json.dumps({"file_content": fixed}))
+        patch = estimate_tokens(json.dumps({"edits": [e.model_dump() for e in edits]}))
+        full_s, patch_s = modeled_latency(full, ttft, decode_rate), modeled_latency(patch, ttft, decode_rate)
+        for i, value in enumerate((full, patch, full_s, patch_s)):
+            totals[i] += value
+        print(f"{filename:<14} {full:>8} {patch:>9} {1 - patch / full:>5.0%} {full_s:>6.2f}s {patch_s:>7.2f}s")
+    full, patch, full_s, patch_s = totals
+    print(f"{'total':<14} {full:>8} {patch:>9} {1 - patch / full:>5.0%} {full_s:>6.2f}s {patch_s:>7.2f}s")
+    print(f"(modeled with {ttft:.2f}s to first token and {decode_rate:.0f} output tokens/s)")
+
+def run_live():
+    # Imported here so the offline run needs no provider credentials.
+    from agents.fixer import FixerAgent
+
+    fixer = FixerAgent(use_mock=False)
+    print(f"{'file':<14} {'full tok':>8} {'patch tok':>9} {'full s':>7} {'patch s':>8} {'patch ok':>9}")
+    for filename, function, buggy, fixed in CORPUS:
+        spec = PlannerSpec(filename=filename, function_name=function,
+                           description=f"Fix the bug in {function}.", steps=[])
+        output = f"FAILED test_{filename} - AssertionError: {function} returned a wrong result"
+
+        start = time.perf_counter()
+        full_out = fixer.run(spec, buggy, output)
+        full_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            patch_out = fixer.run_patch(spec, buggy, output)
+            ok = apply_edits(buggy, patch_out.edits, filename) == fixed
+            patch_tok = estimate_tokens(patch_out.model_dump_json())
+        except ValueError:
+            ok, patch_tok = False, 0
+        patch_s = time.perf_counter() - start
+
+        full_tok = estimate_tokens(full_out.model_dump_json())
+        print(f"{filename:<14} {full_tok:>8} {patch_tok:>9} {full_s:>6.2f}s {patch_s:>7.2f}s {str(ok):>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-file vs patch fix benchmark")
+    parser.add_argument("--ttft", type=float, default=0.5, help="Modeled seconds to first token.")
+    parser.add_argument("--decode-rate", type=float, default=80.0, help="Modeled output tokens per second.")
+    parser.add_argument("--live", action="store_true", help="Call the configured provider instead of modeling.")
+    args = parser.parse_args()
+
+    if args.live:
+        run_live()
+    else:
+        run_offline(args.ttft, args.decode_rate)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Verification time across fix iterations: full-suite reruns vs the incremental test index.
+
+Generates a suite of `--tests` tests (each sleeping `--test-ms`) against a module
+with a bug that breaks `--broken` of them. The first `--iterations - 1` "fixes"
+still carry the bug and the last one is correct, as in a fix loop that needs
+several attempts. Each iteration is verified both ways with the warm worker.
+
+    python -m benchmarks.incremental_verification --tests 200 --broken 3 --iterations 4
+"""
+import argparse
+import logging
+import tempfile
+import time
+
+from orchestrator import Orchestrator
+from utils.file_io import write_file
+from utils.test_results import judge_results
+
+FIXED = "def scale(x):\n    return x * 2\n"
+
+def make_suite(tests: int, test_ms: float) -> str:
+    lines = ["import time", "from calc import scale", ""]
+    for i in range(tests):
+        lines += [f"def test_scale_{i}():", f"    time.sleep({test_ms / 1000!r})", f"    assert scale({i}) == {2 * i}", ""]
+    return "\n".join(lines)
+
+def make_buggy(tests: int, broken: int) -> str:
+    wrong = sorted(range(0, tests, max(1, tests // broken)))[:broken]
+    return f"def scale(x):\n    return x * 3 if x in {set(wrong)!r} else x * 2\n"
+
+def run(orchestrator: Orchestrator, work_dir: str, buggy: str, iterations: int, incremental: bool) -> list:
+    write_file(f"{work_dir}/calc.py", buggy)
+    initial = orchestrator.run_tests("test_calc.py")
+    orchestrator.record_results("test_calc.py", initial)
+    timings = []
+    for i in range(iterations):
+        write_file(f"{work_dir}/calc.py", FIXED if i == iterations - 1 else buggy)
+        start = time.perf_counter()
+        if incremental:
+            result = orchestrator.run_tests_incremental("test_calc.py")
+        else:
+            result = orchestrator.run_tests("test_calc.py")
+        timings.append((time.perf_counter() - start, len(result.tests), judge_results(result).success))
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Full vs incremental verification")
+    parser.add_argument("--tests", type=int, default=200)
+    parser.add_argument("--broken", type=int, default=3, help="Tests broken by the bug.")
+    parser.add_argument("--test-ms", type=float, default=5.0, help="Simulated duration of each test.")
+    parser.add_argument("--iterations", type=int, default=4, help="Fix iterations; only the last fix is correct.")
+    args = parser.parse_args()
+    buggy = make_buggy(args.tests, args.broken)
+
+    logging.getLogger("Orchestrator").setLevel(logging.WARNING)
+    for incremental in (False, True):
+        with tempfile.TemporaryDirectory() as work_dir:
+            write_file(f"{work_dir}/test_calc.py", make_suite(args.tests, args.test_ms))
+            orchestrator = Orchestrator(use_mock=True, work_dir=work_dir)
+            try:
+                timings = run(orchestrator, work_dir, buggy, args.iterations, incremental)
+            finally:
+                orchestrator.close()
+        label = "incremental" if incremental else "full suite"
+        total = sum(seconds for seconds, _, _ in timings)
+        per_iteration = "  ".join(f"{seconds:5.2f}s/{ran:>3} tests{' ok' if ok else ''}" for seconds, ran, ok in timings)
+        print(f"{label:<12} {total:6.2f}s total   {per_iteration}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Local stand-in for an OpenAI-compatible chat-completions server, for load tests.
+
+Answers POST /v1/chat/completions (plain and `stream: true` SSE) with canned
+responses per agent role (Planner, Coder, Tester, Fixer, Judge) for several
+tasks, picked from the goal or the spec's function name. Latency is scripted:
+time to first token is drawn from `--latency` and the output is paced at
+`--tokens-per-sec`. `--error-rate` and `--quota-rpm` inject 429s with a
+Retry-After hint. GET /stats returns request, token and 429 counters.
+
+    python -m benchmarks.llm_server --port 8765 --latency lognormal:0.8,0.5 --error-rate 0.05
+    LLM_BASE_URL=http://127.0.0.1:8765/v1 python orchestrator.py --goal "Write a fibonacci function"
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm.rate_limit import TokenBucket, estimate_tokens
+from utils.patching import diff_to_edits
+
+class Task:
+    def __init__(self, keywords, filename, function_name, description, steps, correct, buggy, tests):
+        self.keywords = keywords
+        self.spec = {"filename": filename, "function_name": function_name, "description": description, "steps": steps}
+        self.function_name = function_name
+        self.correct = correct
+        self.buggy = buggy
+        self.tests = tests
+
+    @property
+    def goal(self) -> str:
+        return f"Write a Python function: {self.spec['description']}"
+
+TASKS = [
+    Task(
+        ["factorial"], "math_ops.py", "factorial",
+        "Calculate the factorial of a non-negative integer. Raises ValueError if n < 0.",
+        ["Check if n is less than 0, raise ValueError if so.", "If n is 0, return 1.", "Otherwise return n * factorial(n-1)."],
+        "def factorial(n):\n    if n < 0:\n        raise ValueError('n must be >= 0')\n    if n == 0:\n        return 1\n    return n * factorial(n - 1)\n",
+        "def factorial(n):\n    if n < 0:\n        raise ValueError('n must be >= 0')\n    if n == 0:\n        return 0\n    return n * factorial(n - 1)\n",
+        "import pytest\nfrom math_ops import factorial\n\ndef test_factorial_values():\n    assert factorial(0) == 1\n    assert factorial(5) == 120\n\ndef test_factorial_negative():\n    with pytest.raises(ValueError):\n        factorial(-1)\n",
+    ),
+    Task(
+        ["fibonacci"], "sequences.py", "fibonacci",
+        "Return the n-th Fibonacci number (fibonacci(0) == 0). Raises ValueError if n < 0.",
+        ["Raise ValueError if n < 0.", "Start with a, b = 0, 1.", "Repeat n times: a, b = b, a + b.", "Return a."],
+        "def fibonacci(n):\n    if n < 0:\n        raise ValueError('n must be >= 0')\n    a, b = 0, 1\n    for _ in range(n):\n        a, b = b, a + b\n    return a\n",
+        "def fibonacci(n):\n    if n < 0:\n        raise ValueError('n must be >= 0')\n    a, b = 0, 1\n    for _ in range(n - 1):\n        a, b = b, a + b\n    return a\n",
+        "import pytest\nfrom sequences import fibonacci\n\ndef test_fibonacci_small():\n    assert fibonacci(0) == 0\n    assert fibonacci(1) == 1\n    assert fibonacci(2) == 1\n\ndef test_fibonacci_larger():\n    assert fibonacci(10) == 55\n\ndef test_fibonacci_negative():\n    with pytest.raises(ValueError):\n        fibonacci(-3)\n",
+    ),
+    Task(
+        ["binary search", "sorted list"], "search.py", "binary_search",
+        "Return the index of target in a sorted list using binary search, or -1 if it is absent.",
+        ["Set low = 0 and high = len(items) - 1.", "While low <= high, compare the middle item with target.", "Narrow the range to the half that can contain target.", "Return -1 if the range becomes empty."],
+        "def binary_search(items, target):\n    low, high = 0, len(items) - 1\n    while low <= high:\n        mid = (low + high) // 2\n        if items[mid] == target:\n            return mid\n        if items[mid] < target:\n            low = mid + 1\n        else:\n            high = mid - 1\n    return -1\n",
+        "def binary_search(items, target):\n    low, high = 0, len(items) - 1\n    while low < high:\n        mid = (low + high) // 2\n        if items[mid] == target:\n            return mid\n        if items[mid] < target:\n            low = mid + 1\n        else:\n            high = mid - 1\n    return -1\n",
+        "from search import binary_search\n\ndef test_found():\n    assert binary_search([1, 3, 5, 7], 7) == 3\n    assert binary_search([1, 3, 5, 7], 1) == 0\n\ndef test_single_item():\n    assert binary_search([4], 4) == 0\n\ndef test_missing():\n    assert binary_search([], 1) == -1\n    assert binary_search([1, 2, 3], 4) == -1\n",
+    ),
+    Task(
+        ["palindrome"], "strings.py", "is_palindrome",
+        "Return True if text reads the same backwards, ignoring case and non-alphanumeric characters.",
+        ["Keep only the alphanumeric characters of text, lower-cased.", "Compare the result with its reverse."],
+        "def is_palindrome(text):\n    cleaned = [c.lower() for c in text if c.isalnum()]\n    return cleaned == cleaned[::-1]\n",
+        "def is_palindrome(text):\n    cleaned = [c for c in text if c.isalnum()]\n    return cleaned == cleaned[::-1]\n",
+        "from strings import is_palindrome\n\ndef test_simple():\n    assert is_palindrome('abba')\n    assert not is_palindrome('abc')\n\ndef test_case_and_punctuation():\n    assert is_palindrome('Racecar')\n    assert is_palindrome('A man, a plan, a canal: Panama')\n\ndef test_empty():\n    assert is_palindrome('')\n",
+    ),
+]
+GOALS = [task.goal for task in TASKS]
+
+def parse_latency(spec: str):
+    """
+    Parses a latency distribution into a sampler `f(rng) -> seconds`:
+    "fixed:S", "uniform:LOW,HIGH", "exp:MEAN" or "lognormal:MEDIAN,SIGMA".
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",")] if params else []
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "exp" and len(values) == 1:
+        return lambda rng: rng.expovariate(1 / values[0]) if values[0] > 0 else 0.0
+    if kind == "lognormal" and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency distribution '{spec}' (use fixed:S, uniform:LOW,HIGH, exp:MEAN or lognormal:MEDIAN,SIGMA)")
+
+def _role(system_prompt: str) -> str:
+    # The same markers MockLLMClient matches on; the Fixer is also a "Senior Python Developer".
+    if "FIX a bug" in system_prompt:
+        return "fixer_patch" if "SEARCH/REPLACE" in system_prompt else "fixer"
+    if "Senior Software Architect" in system_prompt:
+        return "planner"
+    if "Senior Python Developer" in system_prompt:
+        return "coder_buggy" if "SUBTLE BUG" in system_prompt else "coder"
+    if "QA Engineer" in system_prompt:
+        return "tester"
+    if "CI/CD Judge" in system_prompt:
+        return "judge"
+    return "unknown"
+
+def _task_for(role: str, user_prompt: str) -> Task:
+    if role == "planner":
+        goal = user_prompt.lower()
+        for task in TASKS:
+            if any(keyword in goal for keyword in task.keywords):
+                return task
+        return TASKS[zlib.crc32(goal.encode("utf-8")) % len(TASKS)]
+    for task in TASKS:
+        if f"Function Name: {task.function_name}" in user_prompt or f"Function: {task.function_name}" in user_prompt:
+            return task
+    return TASKS[0]
+
+def canned_response(system_prompt: str, user_prompt: str) -> tuple:
+    """Returns (role, JSON payload) for one request."""
+    role = _role(system_prompt)
+    if role == "judge":
+        failed = "failed" in user_prompt or "E " in user_prompt
+        return role, {"success": not failed, "reason": "Tests failed with errors." if failed else "All tests passed."}
+    task = _task_for(role, user_prompt)
+    if role == "planner":
+        return role, task.spec
+    if role == "coder_buggy":
+        return role, {"file_content": task.buggy}
+    if role in ("coder", "fixer"):
+        return role, {"file_content": task.correct}
+    if role == "tester":
+        return role, {"test_content": task.tests}
+    if role == "fixer_patch":
+        return role, {"edits": [edit.model_dump() for edit in diff_to_edits(task.buggy, task.correct)]}
+    return role, {}
+
+class StandInLLM:
+    """Latency, 429 and accounting state shared by all request handler threads."""
+
+    def __init__(self, latency: str = "fixed:0", tokens_per_sec: float = 0.0, error_rate: float = 0.0, quota_rpm: float = 0.0, retry_after: float = 0.5, seed: int = 0):
+        self.sample_latency = parse_latency(latency)
+        self.tokens_per_sec = tokens_per_sec
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self._quota = TokenBucket(quota_rpm, capacity=max(1.0, quota_rpm / 60)) if quota_rpm else None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "rate_limited": 0, "streamed": 0, "prompt_tokens": 0, "completion_tokens": 0, "by_role": {}}
+
+    def admit(self):
+        """Returns (seconds until the first token, None) or (None, retry-after seconds) for a 429."""
+        with self._lock:
+            self.stats["requests"] += 1
+            if self._quota is not None:
+                wait = self._quota.reserve(1, time.monotonic())
+                if wait > 0:
+                    self._quota.adjust(-1)  # rejected requests do not consume quota
+                    self.stats["rate_limited"] += 1
+                    return None, wait
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.stats["rate_limited"] += 1
+                return None, self.retry_after
+            return max(0.0, self.sample_latency(self._rng)), None
+
+    def record(self, role: str, prompt_tokens: int, completion_tokens: int, streamed: bool):
+        with self._lock:
+            self.stats["by_role"][role] = self.stats["by_role"].get(role, 0) + 1
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["completion_tokens"] += completion_tokens
+            self.stats["streamed"] += streamed
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return json.loads(json.dumps(self.stats))
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, as the OpenAI SDK expects
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            self._send_json(200, self.server.llm.snapshot())
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        llm = self.server.llm
+        delay, retry_after = llm.admit()
+        if retry_after is not None:
+            self._send_json(
+                429,
+                {"error": {"message": f"Rate limit reached. Please retry in {retry_after:.2f}s", "type": "requests", "code": "rate_limit_exceeded"}},
+                {"Retry-After": f"{retry_after:.2f}", "retry-after-ms": str(int(retry_after * 1000))},
+            )
+            return
+
+        messages = request.get("messages", [])
+        system_prompt = "\n".join(m.get("content", "") for m in messages if m.get("role") == "system")
+        user_prompt = "\n".join(m.get("content", "") for m in messages if m.get("role") == "user")
+        role, payload = canned_response(system_prompt, user_prompt)
+        content = json.dumps(payload)
+        usage = {
+            "prompt_tokens": estimate_tokens(system_prompt + user_prompt),
+            "completion_tokens": estimate_tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        stream = bool(request.get("stream"))
+        llm.record(role, usage["prompt_tokens"], usage["completion_tokens"], stream)
+
+        time.sleep(delay)
+        meta = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "created": int(time.time()), "model": request.get("model", "stand-in")}
+        if stream:
+            self._stream(meta, content, usage, (request.get("stream_options") or {}).get("include_usage"))
+            return
+        if llm.tokens_per_sec:
+            time.sleep(usage["completion_tokens"] / llm.tokens_per_sec)
+        self._send_json(200, {
+            **meta,
+            "object": "chat.completion",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    def _stream(self, meta: dict, content: str, usage: dict, include_usage: bool):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(choices, **extra):
+            chunk = {**meta, "object": "chat.completion.chunk", "choices": choices, **extra}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+        piece = 16  # ~4 tokens per chunk
+        for i in range(0, len(content), piece):
+            if i and self.server.llm.tokens_per_sec:
+                time.sleep(estimate_tokens(content[i:i + piece]) / self.server.llm.tokens_per_sec)
+            event([{"index": 0, "delta": {"content": content[i:i + piece]}, "finish_reason": None}])
+        event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if include_usage:
+            event([], usage=usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, llm: StandInLLM, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.llm = llm
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+def add_server_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", type=str, default="lognormal:0.5,0.4", help="Time-to-first-token distribution: fixed:S, uniform:LOW,HIGH, exp:MEAN or lognormal:MEDIAN,SIGMA.")
+    parser.add_argument("--tokens-per-sec", type=float, default=200.0, help="Output pacing (0 sends the whole response at once).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of answering a request with a 429.")
+    parser.add_argument("--quota-rpm", type=float, default=0.0, help="Simulated server-side requests/minute quota (0 for none).")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="Retry-After hint sent with injected 429s.")
+    parser.add_argument("--seed", type=int, default=0)
+
+def server_from_args(args, port: int = 0) -> StandInServer:
+    llm = StandInLLM(args.latency, args.tokens_per_sec, args.error_rate, args.quota_rpm, args.retry_after, args.seed)
+    return StandInServer(llm, port=port)
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in server")
+    parser.add_argument("--port", type=int, default=8765)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    server = server_from_args(args, args.port)
+    print(f"Listening on {server.base_url} (set LLM_BASE_URL to this)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
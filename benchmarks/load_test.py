@@ -0,0 +1,126 @@
+"""
+Offline load test: N concurrent orchestrator runs against the local stand-in server.
+
+Starts benchmarks/llm_server.py in a subprocess (so its CPU is not counted),
+points LLMClient at it with LLM_BASE_URL, and runs `--runs` goals through the
+batch runner once per `--concurrency` level. Reports throughput, p50/p95/p99
+latency per phase and per run, CPU time and peak RSS, plus the server's request
+and 429 counters.
+
+    python -m benchmarks.load_test --runs 16 --concurrency 1 4 8
+    python -m benchmarks.load_test --runs 32 --concurrency 8 --latency exp:1.0 --error-rate 0.1 --stream
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from functools import partial
+
+from benchmarks.llm_server import GOALS, add_server_arguments
+from utils.stats import percentile
+
+def start_server(args) -> tuple:
+    cmd = [
+        sys.executable, "-m", "benchmarks.llm_server", "--port", "0",
+        "--latency", args.latency, "--tokens-per-sec", str(args.tokens_per_sec),
+        "--error-rate", str(args.error_rate), "--quota-rpm", str(args.quota_rpm),
+        "--retry-after", str(args.retry_after), "--seed", str(args.seed),
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith("Listening on "):
+        proc.kill()
+        raise RuntimeError(f"Stand-in server failed to start: {line!r}")
+    return proc, line.split()[2]
+
+def server_stats(base_url: str) -> dict:
+    with urllib.request.urlopen(f"{base_url}/stats") as response:
+        return json.load(response)
+
+def cpu_seconds() -> tuple:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime, children.ru_utime + children.ru_stime
+
+def run_level(args, concurrency: int, base_url: str):
+    # Imported here so LLM_BASE_URL / LLM_RPM are set before any client exists.
+    from batch import run_batch
+    from orchestrator import Orchestrator
+
+    goals = [{"goal": GOALS[i % len(GOALS)], "id": str(i)} for i in range(args.runs)]
+    make_orchestrator = partial(
+        Orchestrator, stream=args.stream, fix_mode=args.fix_mode, bug_mode=args.bug_mode, warm_tests=not args.cold_tests,
+    )
+    before_server = server_stats(base_url)
+    before_cpu = cpu_seconds()
+    out = io.StringIO()
+    with tempfile.TemporaryDirectory() as batch_dir, contextlib.redirect_stderr(io.StringIO()):
+        summary = asyncio.run(run_batch(goals, make_orchestrator, concurrency, batch_dir, out=out, warm_tests=not args.cold_tests))
+    after_cpu = cpu_seconds()
+    after_server = server_stats(base_url)
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    phases = {}
+    for record in records:
+        for name, seconds in record.get("phase_timings", {}).items():
+            phases.setdefault(name, []).append(seconds)
+
+    own_cpu, child_cpu = after_cpu[0] - before_cpu[0], after_cpu[1] - before_cpu[1]
+    requests = after_server["requests"] - before_server["requests"]
+    throttled = after_server["rate_limited"] - before_server["rate_limited"]
+    print(f"\n=== concurrency {concurrency}: {summary['succeeded']}/{summary['goals']} runs succeeded in {summary['elapsed']:.1f}s ===")
+    print(f"throughput       {summary['goals_per_minute']:.1f} runs/min, {requests / summary['elapsed']:.1f} LLM requests/s ({throttled} answered with 429)")
+    print(f"run latency      p50 {summary['p50']:.2f}s  p95 {summary['p95']:.2f}s  p99 {summary['p99']:.2f}s")
+    for name, values in phases.items():
+        print(f"  {name:<16} p50 {percentile(values, 50):6.2f}s  p95 {percentile(values, 95):6.2f}s  p99 {percentile(values, 99):6.2f}s")
+    print(
+        f"cpu              {own_cpu:.2f}s orchestrator ({own_cpu / summary['elapsed'] * 100:.0f}% of one core), "
+        f"{child_cpu:.2f}s pytest workers"
+    )
+    own_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    print(f"peak rss         {own_rss / 1024:.0f} MiB orchestrator, {child_rss / 1024:.0f} MiB largest pytest worker")
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent orchestrator runs against a local OpenAI-compatible stand-in")
+    parser.add_argument("--runs", type=int, default=16, help="Goals per concurrency level (cycling through the stand-in's tasks).")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--stream", action="store_true", help="Stream responses (SSE) from the stand-in.")
+    parser.add_argument("--fix-mode", choices=["full", "patch"], default="full")
+    parser.add_argument("--bug-mode", choices=["llm", "mutation"], default="llm")
+    parser.add_argument("--cold-tests", action="store_true")
+    parser.add_argument("--client-rpm", type=float, default=None, help="Client-side LLM_RPM (defaults to the provider default).")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    proc, base_url = start_server(args)
+    os.environ["LLM_BASE_URL"] = base_url
+    if args.client_rpm:
+        os.environ["LLM_RPM"] = str(args.client_rpm)
+    # Per-run logs would interleave; only the report is printed.
+    for name in ("Orchestrator", "LLM", "httpx", "openai"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    print(f"Stand-in server at {base_url}: latency {args.latency}, {args.tokens_per_sec:.0f} tokens/s, "
+          f"429 rate {args.error_rate:.0%}, quota {args.quota_rpm or 'none'} rpm")
+    start = time.perf_counter()
+    try:
+        for concurrency in args.concurrency:
+            run_level(args, concurrency, base_url)
+        by_role = server_stats(base_url)["by_role"]
+        print(f"\nserver requests by role: {', '.join(f'{role} {count}' for role, count in sorted(by_role.items()))}")
+    finally:
+        proc.terminate()
+        proc.wait()
+    print(f"total {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
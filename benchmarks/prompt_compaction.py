@@ -0,0 +1,150 @@
+"""
+Prompt size and per-call latency for raw vs compacted pytest failure output.
+
+Builds a corpus by running pytest on a few generated buggy modules (single
+assertion, many parametrized failures, exceptions through library frames, noisy
+captured stdout, a collection error), then summarizes each output with
+`summarize_failures`. Per-call latency is modeled as a fixed overhead plus input
+tokens / prefill rate; `--live` sends both versions to the configured provider's
+Judge instead.
+
+    python -m benchmarks.prompt_compaction --budget 1000
+    python -m benchmarks.prompt_compaction --live
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from llm.rate_limit import estimate_tokens
+from utils.failure_summary import summarize_failures, DEFAULT_PROMPT_BUDGET
+from utils.file_io import write_file
+
+MODULE = '''import json
+
+def add(a, b):
+    return a - b
+
+def parse(text):
+    print("parsing", text)
+    return json.loads(text)
+
+def window(items, size):
+    return [items[i:i + size] for i in range(0, len(items) - size)]
+'''
+
+SCENARIOS = {
+    "single_assert": '''from ops import add
+
+def test_add():
+    assert add(2, 3) == 5
+
+def test_add_zero():
+    assert add(0, 0) == 0
+''',
+    "parametrized_50": '''import pytest
+from ops import add
+
+@pytest.mark.parametrize("a,b", [(i, i + 1) for i in range(50)])
+def test_add(a, b):
+    assert add(a, b) == a + b
+''',
+    "library_frames": '''from ops import parse
+
+def test_parse_object():
+    assert parse('{"a": 1}') == {"a": 1}
+
+def test_parse_bad():
+    assert parse("{bad") == {}
+
+def test_parse_list():
+    assert parse("[1, 2") == [1, 2]
+''',
+    "noisy_stdout": '''from ops import window
+
+def test_windows():
+    for size in range(1, 20):
+        print("checking size", size, list(range(size)) * 5)
+    assert window(list(range(10)), 3)[-1] == [7, 8, 9]
+
+class TestWindow:
+    def test_pairs(self):
+        print("x" * 2000)
+        assert window([1, 2, 3], 2) == [[1, 2], [2, 3]]
+''',
+    "collection_error": '''from ops import subtract
+
+def test_subtract():
+    assert subtract(3, 2) == 1
+''',
+}
+
+def build_corpus():
+    """Runs each scenario under pytest and returns {name: captured output}."""
+    corpus = {}
+    with tempfile.TemporaryDirectory(prefix="compaction_") as tmp:
+        write_file(os.path.join(tmp, "ops.py"), MODULE)
+        for name, tests in SCENARIOS.items():
+            test_file = f"test_{name}.py"
+            write_file(os.path.join(tmp, test_file), tests)
+            proc = subprocess.run(
+                [sys.executable, "-m", "pytest", test_file, "-p", "no:cacheprovider"],
+                capture_output=True, text=True, cwd=tmp,
+            )
+            corpus[name] = proc.stdout + proc.stderr
+    return corpus
+
+def run_offline(corpus, budget: int, overhead: float, prefill_rate: float):
+    print(f"{'scenario':<18} {'raw tok':>8} {'compact':>8} {'saved':>6} {'summarize':>10} {'raw s':>7} {'compact s':>10}")
+    raw_total = compact_total = 0
+    for name, output in corpus.items():
+        start = time.perf_counter()
+        compact = summarize_failures(output, ("ops.py", f"test_{name}.py"), budget)
+        summarize_ms = (time.perf_counter() - start) * 1000
+        raw, small = estimate_tokens(output), estimate_tokens(compact)
+        raw_total += raw
+        compact_total += small
+        print(f"{name:<18} {raw:>8} {small:>8} {1 - small / raw:>5.0%} {summarize_ms:>8.2f}ms "
+              f"{overhead + raw / prefill_rate:>6.2f}s {overhead + small / prefill_rate:>9.2f}s")
+    print(f"{'total':<18} {raw_total:>8} {compact_total:>8} {1 - compact_total / raw_total:>5.0%}")
+    print(f"(budget {budget} tokens; latency modeled as {overhead:.2f}s + input tokens / {prefill_rate:.0f} per s)")
+
+def run_live(corpus, budget: int):
+    # Imported here so the offline run needs no provider credentials.
+    from agents.judge import JudgeAgent
+
+    judge = JudgeAgent(use_mock=False)
+    print(f"{'scenario':<18} {'raw s':>7} {'compact s':>10} {'same verdict':>13}")
+    for name, output in corpus.items():
+        compact = summarize_failures(output, ("ops.py", f"test_{name}.py"), budget)
+        start = time.perf_counter()
+        raw_verdict = judge.run(output)
+        raw_s = time.perf_counter() - start
+        start = time.perf_counter()
+        compact_verdict = judge.run(compact)
+        compact_s = time.perf_counter() - start
+        print(f"{name:<18} {raw_s:>6.2f}s {compact_s:>9.2f}s {str(raw_verdict.success == compact_verdict.success):>13}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Raw vs compacted pytest output benchmark")
+    parser.add_argument("--budget", type=int, default=DEFAULT_PROMPT_BUDGET, help="Token budget for the summary.")
+    parser.add_argument("--overhead", type=float, default=0.4, help="Modeled fixed seconds per call.")
+    parser.add_argument("--prefill-rate", type=float, default=2000.0, help="Modeled input tokens per second.")
+    parser.add_argument("--show", type=str, default=None, help="Print the raw and compact output of one scenario.")
+    parser.add_argument("--live", action="store_true", help="Call the configured provider instead of modeling.")
+    args = parser.parse_args()
+
+    corpus = build_corpus()
+    if args.show:
+        print(corpus[args.show])
+        print("-" * 40)
+        print(summarize_failures(corpus[args.show], ("ops.py", f"test_{args.show}.py"), args.budget))
+    elif args.live:
+        run_live(corpus, args.budget)
+    else:
+        run_offline(corpus, args.budget, args.overhead, args.prefill_rate)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: cold `pytest` subprocess per run vs. the warm PytestWorker.
+
+Alternates a buggy and a fixed module between iterations (as the orchestrator
+does between the initial and verification runs) and checks that both runners
+see every swap.
+
+    python -m benchmarks.pytest_worker --iterations 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from utils.file_io import write_file
+from utils.test_runner import PytestWorker
+
+BUGGY = "def factorial(n):\n    if n < 0:\n        raise ValueError('n must be >= 0')\n    if n == 0:\n        return 0\n    return n * factorial(n - 1)\n"
+FIXED = "def factorial(n):\n    if n < 0:\n        raise ValueError('n must be >= 0')\n    if n == 0:\n        return 1\n    return n * factorial(n - 1)\n"
+TESTS = "import pytest\nfrom math_ops import factorial\n\ndef test_factorial_success():\n    assert factorial(5) == 120\n    assert factorial(0) == 1\n\ndef test_factorial_error():\n    with pytest.raises(ValueError):\n        factorial(-1)\n"
+
+def run_cold(work_dir: str) -> int:
+    report = os.path.join(work_dir, "report.xml")
+    proc = subprocess.run(
+        [sys.executable, "-m", "pytest", "test_math_ops.py", f"--junitxml={report}"],
+        capture_output=True, text=True, cwd=work_dir,
+    )
+    return proc.returncode
+
+def run_warm(worker: PytestWorker, work_dir: str) -> int:
+    return worker.run(work_dir, ["test_math_ops.py"]).exit_code
+
+def measure(label: str, work_dir: str, iterations: int, run):
+    timings = []
+    for i in range(iterations):
+        fixed = i % 2 == 1
+        write_file(os.path.join(work_dir, "math_ops.py"), FIXED if fixed else BUGGY)
+        start = time.perf_counter()
+        exit_code = run()
+        timings.append(time.perf_counter() - start)
+        expected = 0 if fixed else 1
+        if exit_code != expected:
+            raise SystemExit(f"{label}: iteration {i} returned exit code {exit_code}, expected {expected}")
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:<10} mean {statistics.mean(timings) * 1e3:8.1f} ms   p50 {statistics.median(timings) * 1e3:8.1f} ms   p95 {p95 * 1e3:8.1f} ms")
+    return statistics.mean(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold vs. warm pytest runner benchmark")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        write_file(os.path.join(work_dir, "test_math_ops.py"), TESTS)
+
+        cold = measure("cold", work_dir, args.iterations, lambda: run_cold(work_dir))
+
+        start = time.perf_counter()
+        worker = PytestWorker()
+        worker.pool.submit(int).result()  # wait until the worker is warm
+        print(f"worker warm-up {(time.perf_counter() - start) * 1e3:.1f} ms (paid once)")
+        try:
+            warm = measure("warm", work_dir, args.iterations, lambda: run_warm(worker, work_dir))
+        finally:
+            worker.close()
+
+    print(f"speedup    {cold / warm:.1f}x per run")
+
+if __name__ == "__main__":
+    main()
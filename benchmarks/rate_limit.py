@@ -0,0 +1,114 @@
+"""
+Simulated-429 harness for the shared rate limiter, using MockLLMClient.
+
+Several threads (standing in for agents across concurrent runs) share one mock
+client whose simulated server allows `--quota-rpm`. The reactive run only backs
+off after 429s; the proactive run also goes through a RateLimiter set just under
+the quota.
+
+With `--check`, LLMClient also sends requests to the local stand-in server, which
+answers some of them with 429s. The run asserts that every 429 reached the
+limiter and was retried after its Retry-After hint, and not by the SDK's own retry
+loop. It exits non-zero otherwise.
+
+    python -m benchmarks.rate_limit --threads 8 --calls 15 --quota-rpm 1200
+    python -m benchmarks.rate_limit --check
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from llm.client import LLMClient, MockLLMClient
+from llm.rate_limit import RateLimiter
+
+PLANNER_PROMPT = "You are a Senior Software Architect."
+
+def run_scenario(label: str, client: MockLLMClient, threads: int, calls: int):
+    failures = 0
+
+    def agent():
+        nonlocal failures
+        for _ in range(calls):
+            try:
+                client.call_expecting_json(PLANNER_PROMPT, "Goal: factorial")
+            except Exception:
+                failures += 1
+
+    start = time.perf_counter()
+    with contextlib.redirect_stderr(io.StringIO()), ThreadPoolExecutor(max_workers=threads) as pool:
+        for _ in range(threads):
+            pool.submit(agent)
+    elapsed = time.perf_counter() - start
+
+    total = threads * calls
+    print(f"{label:<11} {elapsed:6.2f}s  {total / elapsed:7.1f} calls/s  "
+          f"{client.simulated_429s:4d} x 429  {failures:3d} failed")
+    if client.rate_limiter is not None:
+        print(f"{'':<11} {client.rate_limiter.summary()}")
+
+def check_backoff(calls: int = 8, error_rate: float = 0.5, retry_after: float = 0.2) -> list:
+    """Returns the failed checks (empty if all passed) for LLMClient against a stand-in answering 429s."""
+    from benchmarks.llm_server import StandInLLM, StandInServer
+
+    server = StandInServer(StandInLLM(error_rate=error_rate, retry_after=retry_after, seed=1))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["LLM_BASE_URL"] = server.base_url
+    try:
+        client = LLMClient(base_url=server.base_url)
+        client.rate_limiter = RateLimiter(float("inf"), float("inf"), name="check")
+        start = time.perf_counter()
+        with contextlib.redirect_stderr(io.StringIO()):
+            for _ in range(calls):
+                client.call_expecting_json(PLANNER_PROMPT, "Goal: factorial")
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    served, limiter = server.llm.snapshot(), client.rate_limiter.stats
+    print(f"check       {calls} calls: server saw {served['requests']} requests ({served['rate_limited']} x 429), "
+          f"limiter sent {limiter['acquired']} and throttled {limiter['throttled']}, {elapsed:.2f}s")
+    failures = []
+    if not served["rate_limited"]:
+        failures.append("the stand-in sent no 429s; nothing was checked")
+    if served["requests"] != limiter["acquired"]:
+        failures.append(f"the server saw {served['requests']} requests but the limiter only sent {limiter['acquired']} (SDK-internal retries)")
+    if served["rate_limited"] != limiter["throttled"]:
+        failures.append(f"{served['rate_limited']} 429s were sent but the limiter backed off {limiter['throttled']} times")
+    if elapsed < served["rate_limited"] * retry_after:
+        failures.append(f"{served['rate_limited']} retries took {elapsed:.2f}s, less than their Retry-After hints")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated 429 rate-limit harness")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=15, help="Calls per thread.")
+    parser.add_argument("--quota-rpm", type=float, default=1200, help="Simulated server quota.")
+    parser.add_argument("--latency", type=float, default=0.01, help="Simulated seconds per call.")
+    parser.add_argument("--check", action="store_true", help="Only assert that real 429s from the stand-in server are backed off by the limiter.")
+    args = parser.parse_args()
+
+    if args.check:
+        failures = check_backoff()
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1 if failures else 0)
+
+    print(f"{args.threads} threads x {args.calls} calls against a {args.quota_rpm:.0f} RPM quota")
+    # Reactive: backoff only, with a limiter so 429 hints pause every thread.
+    reactive = MockLLMClient(latency=args.latency, quota_rpm=args.quota_rpm,
+                             rate_limiter=RateLimiter(float("inf"), float("inf"), name="reactive"))
+    run_scenario("reactive", reactive, args.threads, args.calls)
+
+    # Burst matches the simulated server's one-second window.
+    limiter = RateLimiter(args.quota_rpm * 0.95, float("inf"), name="proactive", burst=args.quota_rpm / 60)
+    proactive = MockLLMClient(latency=args.latency, quota_rpm=args.quota_rpm, rate_limiter=limiter)
+    run_scenario("proactive", proactive, args.threads, args.calls)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Cold-start time of the CLI, measured in fresh interpreters.
+
+Reports the `-X importtime` cumulative time of `import orchestrator` (with the
+slowest packages), the wall time of `orchestrator.py --help`, and the time to
+construct an Orchestrator in mock and real mode. It also checks that none of
+these paths imports a provider SDK, which should only happen on the first real
+LLM request. With `--budget-ms`, it exits non-zero when `import orchestrator`
+is over budget or an SDK was imported, so batch jobs can use it as a guard.
+
+    python -m benchmarks.startup --repeat 5
+    python -m benchmarks.startup --budget-ms 400
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SDK_MODULES = ("openai", "google.generativeai", "google.ai.generativelanguage", "httpx")
+
+CONSTRUCT = """
+import json, sys, time
+start = time.perf_counter()
+from orchestrator import Orchestrator
+Orchestrator(use_mock={mock}, warm_tests=False)
+print(json.dumps({{"seconds": time.perf_counter() - start, "sdk": [m for m in {sdk!r} if m in sys.modules]}}))
+"""
+
+def _env(real: bool = False) -> dict:
+    env = dict(os.environ)
+    if real:
+        # A dummy key is enough: constructing clients must not contact (or even import) the SDK.
+        env.pop("LLM_BASE_URL", None)
+        env.pop("GEMINI_API_KEY", None)
+        env.setdefault("OPENAI_API_KEY", "sk-startup-benchmark-0000")
+    return env
+
+def run_python(args, env=None) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, cwd=ROOT, env=env or _env())
+
+def wall_time(args, repeat: int, env=None) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = run_python(args, env)
+        times.append(time.perf_counter() - start)
+        if proc.returncode != 0:
+            raise RuntimeError(f"python {' '.join(args)} failed:\n{proc.stderr}")
+    return statistics.median(times)
+
+def import_profile(module: str, repeat: int):
+    """Returns (median cumulative microseconds, {top-level package: self microseconds}) for importing `module`."""
+    totals, packages = [], {}
+    for _ in range(repeat):
+        proc = run_python(["-X", "importtime", "-c", f"import {module}"])
+        by_package = {}
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+            by_package[name.split(".")[0]] = by_package.get(name.split(".")[0], 0) + int(self_us)
+            if name == module:
+                totals.append(int(cumulative_us))
+        for package, us in by_package.items():
+            packages.setdefault(package, []).append(us)
+    return statistics.median(totals), {package: statistics.median(values) for package, values in packages.items()}
+
+def construct(mock: bool, repeat: int):
+    env = _env(real=not mock)
+    results = []
+    for _ in range(repeat):
+        proc = run_python(["-c", CONSTRUCT.format(mock=mock, sdk=SDK_MODULES)], env)
+        if proc.returncode != 0:
+            raise RuntimeError(f"Constructing the Orchestrator failed:\n{proc.stderr}")
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return statistics.median(r["seconds"] for r in results), sorted({m for r in results for m in r["sdk"]})
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI cold-start benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement (the median is reported).")
+    parser.add_argument("--top", type=int, default=8, help="Slowest packages to list.")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if `import orchestrator` takes longer than this.")
+    args = parser.parse_args()
+
+    baseline = wall_time(["-c", "pass"], args.repeat)
+    import_us, packages = import_profile("orchestrator", args.repeat)
+    help_time = wall_time(["orchestrator.py", "--help"], args.repeat)
+    mock_time, mock_sdk = construct(True, args.repeat)
+    real_time, real_sdk = construct(False, args.repeat)
+
+    print(f"interpreter startup        {baseline * 1000:7.1f} ms")
+    print(f"import orchestrator        {import_us / 1000:7.1f} ms  (-X importtime, cumulative)")
+    for package, us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {package:<24} {us / 1000:7.1f} ms")
+    print(f"orchestrator.py --help     {help_time * 1000:7.1f} ms  wall ({(help_time - baseline) * 1000:.1f} ms over bare startup)")
+    print(f"Orchestrator(mock)         {mock_time * 1000:7.1f} ms  provider SDKs imported: {', '.join(mock_sdk) or 'none'}")
+    print(f"Orchestrator(real)         {real_time * 1000:7.1f} ms  provider SDKs imported: {', '.join(real_sdk) or 'none'}")
+
+    failures = []
+    if mock_sdk or real_sdk:
+        failures.append("a provider SDK was imported before the first LLM request")
+    if args.budget_ms is not None and import_us / 1000 > args.budget_ms:
+        failures.append(f"import orchestrator took {import_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import os
+import time
+import logging
+import random
+import asyncio
+import weakref
+from typing import Callable, Optional
+
+from llm.cache import ResponseCache
+from llm.client import LLMClient, MockLLMClient, resolve_provider, parse_json_content, get_response_cache
+from llm.rate_limit import get_rate_limiter, acall_with_retries, estimate_tokens, EXPECTED_OUTPUT_TOKENS
+from utils.tracing import get_tracer
+
+logger = logging.getLogger("LLM")
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 120.0  # seconds per request attempt
+
+class AsyncLLMClient:
+    """
+    Async counterpart of LLMClient built on the providers' async APIs.
+
+    At most `max_concurrency` requests are in flight at once, and each request
+    attempt is cancelled after `timeout` seconds. Cancelling the calling task
+    cancels the request and frees its slot. The rate limiter and response cache
+    are the same ones the sync client uses.
+    """
+
+    def __init__(self, cache: Optional[ResponseCache] = None, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT):
+        self.provider, self.model = resolve_provider()
+        self.cache = cache
+        self.rate_limiter = get_rate_limiter(self.provider)
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self._client = None
+        self._gemini_model = None
+
+    @property
+    def client(self):
+        """The provider's async SDK client, imported and configured on the first request."""
+        if self._client is None:
+            if self.provider == "gemini":
+                import google.generativeai as genai
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                self._client = genai
+            else:
+                from openai import AsyncOpenAI
+                base_url = os.getenv("LLM_BASE_URL")
+                self._client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY") or ("local" if base_url else None), base_url=base_url, max_retries=0)
+            logger.debug(f"Using async {self.provider} API (max {self.max_concurrency} concurrent requests)")
+        return self._client
+
+    async def call(self, system_prompt: str, user_prompt: str, response_format=None, temperature: float = 0.0, timeout: Optional[float] = None, validate: Optional[Callable[[str], object]] = None) -> str:
+        """Returns the completion text; as with LLMClient.call, it is only cached once `validate` accepts it."""
+        with get_tracer().span(
+            "llm.call", kind="llm", provider=self.provider, model=self.model,
+            prompt_chars=len(system_prompt) + len(user_prompt), mode="async",
+        ) as span:
+            cache = self.cache
+            if cache is not None:
+                key = cache.make_key(self.provider, self.model, system_prompt, user_prompt, response_format, temperature)
+                cached = cache.get(key)
+                if cached is not None:
+                    span.set(cache_hit=True, response_chars=len(cached))
+                    return cached
+
+            start = time.perf_counter()
+            timeout = timeout or self.timeout
+            estimated = estimate_tokens(system_prompt + user_prompt) + EXPECTED_OUTPUT_TOKENS
+            async with self.semaphore:
+                span.set(queue_wait=time.perf_counter() - start)
+                try:
+                    content = await acall_with_retries(
+                        self.rate_limiter,
+                        lambda: asyncio.wait_for(self._request(system_prompt, user_prompt, response_format, temperature), timeout),
+                        estimated,
+                        label=self.provider,
+                    )
+                except asyncio.TimeoutError:
+                    raise RuntimeError(f"LLM call timed out after {timeout:.0f}s ({self.provider})")
+                except Exception as e:
+                    raise RuntimeError(f"LLM call failed ({self.provider}): {e}")
+            span.set(response_chars=len(content))
+            if validate is not None:
+                validate(content)
+            if cache is not None:
+                cache.put(key, content, latency=time.perf_counter() - start)
+            return content
+
+    async def _request(self, system_prompt: str, user_prompt: str, response_format=None, temperature: float = 0.0):
+        """Sends a single request; returns (content, total tokens used or None)."""
+        if self.provider == "gemini":
+            full_prompt, generation_config = LLMClient._gemini_args(system_prompt, user_prompt, response_format, temperature)
+            if self._gemini_model is None:
+                self._gemini_model = self.client.GenerativeModel(self.model)
+            response = await self._gemini_model.generate_content_async(full_prompt, generation_config=generation_config)
+            if not response.parts:
+                raise ValueError("Gemini returned no content (likely safety filter or empty generation).")
+            usage = getattr(response, "usage_metadata", None)
+            return response.text, getattr(usage, "total_token_count", None)
+
+        completion = await self.client.chat.completions.create(
+            model=self.model,
+            messages=LLMClient._openai_messages(system_prompt, user_prompt),
+            response_format=response_format,
+            temperature=temperature,
+        )
+        usage = completion.usage
+        return completion.choices[0].message.content, usage.total_tokens if usage else None
+
+    async def call_expecting_json(self, system_prompt: str, user_prompt: str, temperature: float = 0.0) -> dict:
+        system_prompt += "\n\nIMPORTANT: Output valid JSON only."
+        content = await self.call(system_prompt, user_prompt, response_format={"type": "json_object"}, temperature=temperature, validate=parse_json_content)
+        return parse_json_content(content)
+
+    async def aclose(self):
+        """Closes the SDK client's connection pool; the next request opens a new one."""
+        client, self._client = self._client, None
+        self._gemini_model = None
+        if self.provider == "openai" and client is not None:
+            await client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+class AsyncMockLLMClient:
+    """Async mock with the canned responses of MockLLMClient and simulated, optionally jittered, latency."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT):
+        self.latency = latency
+        self.jitter = jitter
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.call_count = 0
+        self._responses = MockLLMClient()
+
+    async def _simulate_request(self):
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+    async def call_expecting_json(self, system_prompt: str, user_prompt: str, temperature: float = 0.0, timeout: Optional[float] = None) -> dict:
+        self.call_count += 1
+        with get_tracer().span("llm.call", kind="llm", provider="mock", prompt_chars=len(system_prompt) + len(user_prompt), mode="async"):
+            async with self.semaphore:
+                try:
+                    await asyncio.wait_for(self._simulate_request(), timeout or self.timeout)
+                except asyncio.TimeoutError:
+                    raise RuntimeError(f"LLM call timed out after {timeout or self.timeout:.2f}s (mock)")
+            return self._responses._respond(system_prompt, user_prompt)
+
+    async def aclose(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+# Async clients hold connections bound to the event loop they were created on, so they are shared per loop.
+_ASYNC_CLIENTS = weakref.WeakKeyDictionary()
+
+def get_async_llm_client(use_mock: bool = False):
+    """
+    Returns the shared async client for the configured provider on the running event loop.
+    Whoever runs the loop closes these with `aclose_async_llm_clients()` before it ends.
+    """
+    clients = _ASYNC_CLIENTS.setdefault(asyncio.get_running_loop(), {})
+    key = ("mock", None) if use_mock else resolve_provider()
+    client = clients.get(key)
+    if client is None:
+        client = AsyncMockLLMClient() if use_mock else AsyncLLMClient(cache=get_response_cache())
+        clients[key] = client
+    return client
+
+def set_async_llm_client(client):
+    """Installs `client` as the shared async client for its provider on the running event loop."""
+    key = ("mock", None) if isinstance(client, AsyncMockLLMClient) else (client.provider, client.model)
+    _ASYNC_CLIENTS.setdefault(asyncio.get_running_loop(), {})[key] = client
+
+async def aclose_async_llm_clients():
+    """Closes and drops the shared async clients of the running event loop."""
+    clients = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
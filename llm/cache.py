@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+DEFAULT_CACHE_DIR = ".llm_cache"
+
+class ResponseCache:
+    """
+    Content-addressed cache for LLM responses.
+
+    Entries are keyed by a hash of (provider, model, system prompt, user prompt,
+    response_format, temperature) and live in two tiers: an in-memory LRU and a
+    sqlite file on disk. The disk tier is capped in bytes (least recently used entries are evicted
+    first) and both tiers drop entries older than `ttl` seconds.
+
+    `enabled=False` bypasses the cache entirely; `refresh=True` ignores existing
+    entries but stores the fresh responses.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_memory_entries: int = 256,
+        max_disk_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 7 * 24 * 3600,
+        enabled: bool = True,
+        refresh: bool = False,
+    ):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self.enabled = enabled
+        self.refresh = refresh
+
+        self._memory = OrderedDict()  # key -> (created, latency, value)
+        self._lock = threading.Lock()
+        self._db = None
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "bytes_served": 0,
+            "bytes_stored": 0,
+            "evictions": 0,
+            "seconds_saved": 0.0,
+        }
+
+    @staticmethod
+    def make_key(provider: str, model: str, system_prompt: str, user_prompt: str, response_format=None, temperature: float = 0.0) -> str:
+        payload = json.dumps(
+            [provider, model, system_prompt, user_prompt, response_format, temperature],
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _connect(self):
+        if self._db is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._db = sqlite3.connect(os.path.join(self.cache_dir, "responses.sqlite"), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL, latency REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+            self._db.commit()
+        return self._db
+
+    def _remember(self, key: str, entry: tuple):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _hit(self, tier: str, value: str, latency: float) -> str:
+        self.stats[f"{tier}_hits"] += 1
+        self.stats["bytes_served"] += len(value.encode("utf-8"))
+        self.stats["seconds_saved"] += latency
+        return value
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled or self.refresh:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    return self._hit("memory", entry[2], entry[1])
+                del self._memory[key]
+
+            db = self._connect()
+            row = db.execute("SELECT value, created, latency FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                value, created, latency = row
+                if now - created <= self.ttl:
+                    db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                    db.commit()
+                    self._remember(key, (created, latency, value))
+                    return self._hit("disk", value, latency)
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                db.commit()
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, value: str, latency: float = 0.0):
+        """Stores a response; `latency` is the round-trip it cost, credited back on every hit."""
+        if not self.enabled:
+            return
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._remember(key, (now, latency, value))
+            db = self._connect()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed, latency) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, value, size, now, now, latency),
+            )
+            self.stats["bytes_stored"] += size
+            self._evict(db)
+            db.commit()
+
+    def _evict(self, db):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed ASC").fetchall():
+            if total <= self.max_disk_bytes:
+                break
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            total -= size
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._connect().execute("DELETE FROM responses")
+            self._db.commit()
+
+    def summary(self) -> str:
+        s = self.stats
+        lookups = s["memory_hits"] + s["disk_hits"] + s["misses"]
+        hit_rate = (s["memory_hits"] + s["disk_hits"]) / lookups * 100 if lookups else 0.0
+        return (
+            f"hits {s['memory_hits']} memory / {s['disk_hits']} disk, misses {s['misses']} "
+            f"({hit_rate:.0f}% hit rate), {s['bytes_served']} bytes served, {s['bytes_stored']} bytes stored, "
+            f"{s['evictions']} evicted, ~{s['seconds_saved']:.1f}s of LLM round-trips saved"
+        )
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
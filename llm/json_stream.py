@@ -0,0 +1,69 @@
+import re
+from typing import Callable
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+class JsonStringStreamer:
+    """
+    Incrementally extracts one top-level string value from a JSON document that
+    arrives in chunks.
+
+    Feed raw chunks with `feed`; decoded pieces of the value for `key` are passed to
+    `on_text` as soon as they are complete, so a large `file_content` can be written
+    out while the model is still generating it. Escapes split across chunks
+    (including \\uXXXX surrogate pairs) are held back until they can be decoded.
+    The full raw text is kept in `text` for the final json.loads.
+    """
+
+    def __init__(self, key: str, on_text: Callable[[str], None]):
+        self.on_text = on_text
+        self.text = ""
+        self.done = False
+        self._start = re.compile(r'"' + re.escape(key) + r'"\s*:\s*"')
+        self._pos = None  # index in self.text of the next undecoded value character
+        self._high_surrogate = None
+
+    def feed(self, chunk: str):
+        self.text += chunk
+        if self.done:
+            return
+        if self._pos is None:
+            match = self._start.search(self.text)
+            if not match:
+                return
+            self._pos = match.end()
+        self._decode()
+
+    def _decode(self):
+        text, i, out = self.text, self._pos, []
+        while i < len(text):
+            ch = text[i]
+            if ch == '"':
+                self.done = True
+                i += 1
+                break
+            if ch != "\\":
+                out.append(ch)
+                i += 1
+                continue
+            if i + 1 >= len(text):
+                break  # escape split across chunks
+            esc = text[i + 1]
+            if esc == "u":
+                if i + 6 > len(text):
+                    break
+                code = int(text[i + 2:i + 6], 16)
+                i += 6
+                if 0xD800 <= code < 0xDC00:
+                    self._high_surrogate = code
+                    continue
+                if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+                    code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+                self._high_surrogate = None
+                out.append(chr(code))
+            else:
+                out.append(_ESCAPES.get(esc, esc))
+                i += 2
+        self._pos = i
+        if out:
+            self.on_text("".join(out))
@@ -0,0 +1,261 @@
+import os
+import re
+import time
+import random
+import logging
+import threading
+from typing import Callable, Optional, Tuple
+
+from utils.tracing import current_span
+
+logger = logging.getLogger("LLM")
+
+# Conservative per-provider defaults (requests/minute, tokens/minute); override with LLM_RPM / LLM_TPM.
+DEFAULT_LIMITS = {
+    "gemini": (15, 1_000_000),
+    "openai": (500, 200_000),
+    "mock": (1_000_000, 1_000_000_000),
+}
+# Output tokens we budget for before a call; corrected with the real usage afterwards.
+EXPECTED_OUTPUT_TOKENS = 1024
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Takes `amount` (going into debt if needed) and returns how long to wait before using it."""
+        self._refill(now)
+        # A single request larger than the bucket must still be admissible eventually.
+        self.tokens -= min(amount, self.capacity)
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def adjust(self, delta: float):
+        """Charges (positive) or refunds (negative) tokens after the fact."""
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+class RateLimiter:
+    """
+    Proactive requests-per-minute and tokens-per-minute limiter shared by every caller of a provider.
+
+    Callers reserve capacity up front and then wait outside the lock, so the wait is
+    per caller: only the throttled call sleeps (or awaits), unrelated work keeps going.
+    A 429 with a Retry-After style hint pauses new reservations for all callers.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, name: str = "", burst: Optional[float] = None):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute, capacity=burst)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"acquired": 0, "waits": 0, "wait_seconds": 0.0, "throttled": 0}
+
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            wait = max(
+                self.requests.reserve(1, now),
+                self.tokens.reserve(tokens, now),
+                self.blocked_until - now,
+                0.0,
+            )
+            self.stats["acquired"] += 1
+            if wait > 0:
+                self.stats["waits"] += 1
+                self.stats["wait_seconds"] += wait
+            return wait
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Blocks the calling thread until a request of `tokens` may be sent; returns the time waited."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: int = 0) -> float:
+        import asyncio  # only async callers pay for importing asyncio
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def record_usage(self, estimated: int, actual: Optional[int]):
+        if actual is None:
+            return
+        with self._lock:
+            self.tokens.adjust(actual - estimated)
+
+    def throttle(self, delay: float):
+        """Called on a 429: nobody gets new capacity for `delay` seconds."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            self.stats["throttled"] += 1
+
+    def summary(self) -> str:
+        s = self.stats
+        return (
+            f"{self.name or 'limiter'}: {s['acquired']} requests, {s['waits']} waited "
+            f"({s['wait_seconds']:.1f}s total), {s['throttled']} throttled (429) and retried"
+        )
+
+def is_rate_limit_error(error: Exception) -> bool:
+    text = f"{type(error).__name__} {error}"
+    return "429" in text or "ResourceExhausted" in text or "RateLimitError" in text or "rate limit" in text.lower()
+
+# Failures the SDKs retry on their own; their retries are off, so call_with_retries handles these too.
+_TRANSIENT_ERRORS = {"APIConnectionError", "APITimeoutError", "InternalServerError", "ServiceUnavailable", "DeadlineExceeded", "ServerError"}
+_TRANSIENT_STATUS = {408, 409}
+
+def is_transient_error(error: Exception) -> bool:
+    """Connection errors, timeouts, 408/409 and 5xx responses: worth retrying, but not a quota signal."""
+    if any(cls.__name__ in _TRANSIENT_ERRORS for cls in type(error).__mro__):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return isinstance(status, int) and (status in _TRANSIENT_STATUS or status >= 500)
+
+_RETRY_HINTS = [
+    re.compile(r"retry[- ]after[\"']?\s*[:=]\s*[\"']?(\d+(?:\.\d+)?)", re.IGNORECASE),
+    re.compile(r"retry in (\d+(?:\.\d+)?)\s*s", re.IGNORECASE),
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE),
+]
+
+def retry_after_hint(error: Exception) -> Optional[float]:
+    """Extracts a server-provided retry delay (Retry-After header or provider message), if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        if headers.get("retry-after-ms"):
+            try:
+                return float(headers["retry-after-ms"]) / 1000
+            except ValueError:
+                pass
+        if headers.get("retry-after"):
+            try:
+                return float(headers["retry-after"])
+            except ValueError:
+                pass
+    for pattern in _RETRY_HINTS:
+        match = pattern.search(str(error))
+        if match:
+            return float(match.group(1))
+    return None
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None, base: float = 2.0, cap: float = 60.0) -> float:
+    """Jittered exponential backoff; a server hint replaces the exponential part."""
+    if retry_after is not None:
+        return retry_after + random.uniform(0, min(1.0, retry_after * 0.1 + 0.05))
+    delay = min(cap, base * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def _on_rate_limit(limiter: Optional[RateLimiter], error: Exception, attempt: int, label: str, span) -> float:
+    delay = backoff_delay(attempt, retry_after_hint(error))
+    span.add("retries", 1)
+    if limiter is not None:
+        limiter.throttle(delay)
+    logger.info(f"{label} rate limit hit. Backing off {delay:.1f}s before retry {attempt + 1}...")
+    return delay
+
+def _on_transient_error(error: Exception, attempt: int, label: str, span) -> float:
+    # Only this caller backs off: a 5xx or dropped connection says nothing about the shared quota.
+    delay = backoff_delay(attempt, retry_after_hint(error))
+    span.add("retries", 1)
+    logger.info(f"{label} request failed ({type(error).__name__}). Backing off {delay:.1f}s before retry {attempt + 1}...")
+    return delay
+
+def call_with_retries(
+    limiter: Optional[RateLimiter],
+    request: Callable[[], Tuple[str, Optional[int]]],
+    estimated_tokens: int,
+    retries: int = 4,
+    label: str = "LLM",
+    span=None,
+) -> str:
+    """
+    Sends `request` through the limiter, retrying rate-limit errors, connection errors,
+    timeouts and 5xx responses with jittered backoff.
+
+    `request` returns (content, total_tokens_used or None). Retries, time spent waiting
+    and token usage are recorded on `span` (the current span by default).
+    """
+    span = span or current_span()
+    for attempt in range(retries):
+        if limiter is not None:
+            span.add("rate_limit_wait", limiter.acquire(estimated_tokens))
+        try:
+            content, used = request()
+        except Exception as e:
+            if is_rate_limit_error(e) and attempt < retries - 1:
+                delay = _on_rate_limit(limiter, e, attempt, label, span)
+                if limiter is None:
+                    time.sleep(delay)
+                    span.add("rate_limit_wait", delay)
+                continue
+            if is_transient_error(e) and attempt < retries - 1:
+                time.sleep(_on_transient_error(e, attempt, label, span))
+                continue
+            raise
+        if used:
+            span.set(tokens=used)
+        if limiter is not None:
+            limiter.record_usage(estimated_tokens, used)
+        return content
+
+async def acall_with_retries(
+    limiter: Optional[RateLimiter],
+    request: Callable,
+    estimated_tokens: int,
+    retries: int = 4,
+    label: str = "LLM",
+    span=None,
+) -> str:
+    """Async twin of `call_with_retries`; `request` is a coroutine function."""
+    import asyncio
+    span = span or current_span()
+    for attempt in range(retries):
+        if limiter is not None:
+            span.add("rate_limit_wait", await limiter.acquire_async(estimated_tokens))
+        try:
+            content, used = await request()
+        except Exception as e:
+            if is_rate_limit_error(e) and attempt < retries - 1:
+                delay = _on_rate_limit(limiter, e, attempt, label, span)
+                if limiter is None:
+                    await asyncio.sleep(delay)
+                    span.add("rate_limit_wait", delay)
+                continue
+            if is_transient_error(e) and attempt < retries - 1:
+                await asyncio.sleep(_on_transient_error(e, attempt, label, span))
+                continue
+            raise
+        if used:
+            span.set(tokens=used)
+        if limiter is not None:
+            limiter.record_usage(estimated_tokens, used)
+        return content
+
+_LIMITERS = {}
+_LIMITERS_LOCK = threading.Lock()
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """Returns the process-wide limiter for a provider, shared by all agents and concurrent runs."""
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(provider)
+        if limiter is None:
+            rpm, tpm = DEFAULT_LIMITS.get(provider, DEFAULT_LIMITS["openai"])
+            rpm = float(os.getenv("LLM_RPM", rpm))
+            tpm = float(os.getenv("LLM_TPM", tpm))
+            limiter = RateLimiter(rpm, tpm, name=provider)
+            _LIMITERS[provider] = limiter
+        return limiter
@@ -1,8 +1,15 @@
 import os
 import sys
+import time
+import shutil
+import tempfile
+import threading
+import contextvars
 import subprocess
 import argparse
 import logging
+from typing import List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from colorama import init, Fore, Style
 
 from agents.planner import PlannerAgent
@@ -10,7 +17,20 @@ from agents.coder import CoderAgent
 from agents.tester import TesterAgent
 from agents.fixer import FixerAgent
 from agents.judge import JudgeAgent
-from utils.file_io import write_file, read_file
+from llm.cache import ResponseCache, DEFAULT_CACHE_DIR
+from llm.client import set_response_cache
+from utils.file_io import write_file, read_file, StreamingFileWriter
+from utils.scheduler import PhaseScheduler
+from utils.checkpoint import RunStore
+from utils.tracing import Tracer, get_tracer, set_tracer, current_span
+from utils.patching import apply_edits
+from utils.mutation import generate_mutants
+from utils.preflight import PreflightGate, function_signature
+from utils.failure_summary import summarize_failures, DEFAULT_PROMPT_BUDGET
+from utils.test_results import parse_junit_xml, judge_results, EXIT_OK, EXIT_INTERRUPTED, EXIT_NO_TESTS
+from utils.test_index import TestIndex, suite_key
+from utils.test_runner import PytestWorker
+from schemas import PlannerSpec, CoderOutput, TesterOutput, FixerOutput, JudgeOutput, TestRunResult, OrchestrationResult
 
 # Initialize colorama
 init(autoreset=True)
@@ -20,115 +40,819 @@ logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger("Orchestrator")
 
 WORK_DIR = "generated_workspace"
+MAX_MUTANTS = 30
+# Re-requests allowed when a generated file fails the pre-flight checks
+PREFLIGHT_RETRIES = 2
+# Mutants can loop forever; give each test run a multiple of the clean run, with a floor.
+MUTANT_TIMEOUT_FACTOR = 5
+MUTANT_TIMEOUT_FLOOR = 2.0
+# Mutants tested at once when injecting a bug by mutation
+DEFAULT_MUTATION_WORKERS = min(4, os.cpu_count() or 1)
+
+# (temperature, strategy hint) per fix candidate; see `fix_strategy` for candidates past the end.
+FIX_STRATEGIES = [
+    (0.0, None),
+    (0.4, "Re-derive the expected behaviour from the spec and the failing assertions before changing any code."),
+    (0.7, "Check boundary conditions, base cases and comparison operators first."),
+    (0.9, "Rewrite the function body from scratch following the spec's steps."),
+]
+
+def fix_strategy(index: int) -> Tuple[float, Optional[str]]:
+    """
+    (temperature, hint) for fix candidate `index`. Candidates past the end of FIX_STRATEGIES
+    reuse an entry, with at least some temperature and their number added to the hint, so
+    their prompt (and cache key) differs and they are not served an earlier candidate's response.
+    """
+    temperature, hint = FIX_STRATEGIES[index % len(FIX_STRATEGIES)]
+    if index < len(FIX_STRATEGIES):
+        return temperature, hint
+    variant = f"This is candidate {index + 1} of several; propose a fix the others are unlikely to try."
+    return max(temperature, FIX_STRATEGIES[1][0]), f"{hint} {variant}" if hint else variant
 
 class Orchestrator:
-    def __init__(self, use_mock: bool = False):
+    def __init__(
+        self,
+        use_mock: bool = False,
+        llm_judge_fallback: bool = True,
+        warm_tests: bool = True,
+        work_dir: str = WORK_DIR,
+        test_worker: Optional[PytestWorker] = None,
+        fix_candidates: int = 1,
+        fix_rounds: int = 1,
+        stream: bool = False,
+        fix_mode: str = "full",
+        prompt_budget: Optional[int] = DEFAULT_PROMPT_BUDGET,
+        bug_mode: str = "llm",
+        mutation_workers: int = DEFAULT_MUTATION_WORKERS,
+    ):
+        self.work_dir = work_dir
+        self.stream = stream
+        self.fix_mode = fix_mode
+        self.prompt_budget = prompt_budget
+        self.bug_mode = bug_mode
+        self.mutation_workers = max(1, mutation_workers)
+        self.bug_stats = {}
+        self.preflight = PreflightGate()
+        self.test_index = TestIndex()
+        self.fix_candidates = max(1, fix_candidates)
+        self.fix_rounds = max(1, fix_rounds)
+        self.fix_stats = {}
         self.planner = PlannerAgent(use_mock=use_mock)
         self.coder = CoderAgent(use_mock=use_mock)
         self.tester = TesterAgent(use_mock=use_mock)
         self.fixer = FixerAgent(use_mock=use_mock)
-        self.judge = JudgeAgent(use_mock=use_mock)
+        self.judge = JudgeAgent(use_mock=use_mock, llm_fallback=llm_judge_fallback, prompt_budget=prompt_budget)
+        # Pre-warmed pytest process, started by `start()` (or the first test run) rather than
+        # here, so building an Orchestrator never spawns processes. A worker passed in
+        # (e.g. shared by a batch) is owned by the caller.
+        self._owns_worker = test_worker is None and warm_tests
+        self._worker_lock = threading.Lock()
+        self.test_worker = test_worker
+
+    def _ensure_worker(self) -> Optional[PytestWorker]:
+        if self.test_worker is None and self._owns_worker:
+            with self._worker_lock:
+                if self.test_worker is None:
+                    # One warm process per fix candidate (or mutant) so they are tested in parallel.
+                    workers = max(self.fix_candidates, self.mutation_workers if self.bug_mode == "mutation" else 1)
+                    self.test_worker = PytestWorker(max_workers=workers)
+        return self.test_worker
+
+    def close(self):
+        if self.test_worker and self._owns_worker:
+            self.test_worker.close()
+        self._owns_worker = False
+        self.test_worker = None
         
-    def run_command(self, cmd):
-        """Runs a shell command and returns stdout + stderr."""
+    def run_command(self, cmd, cwd: Optional[str] = None, timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """Runs a shell command (in the workspace by default) and returns the completed process."""
         logger.info(f"{Fore.YELLOW}Executing: {' '.join(cmd)}")
-        result = subprocess.run(
-            cmd, 
-            capture_output=True, 
-            text=True, 
-            cwd=WORK_DIR
+        with get_tracer().span("subprocess", kind="subprocess", cmd=" ".join(cmd)) as span:
+            try:
+                result = subprocess.run(
+                    cmd, 
+                    capture_output=True, 
+                    text=True, 
+                    cwd=cwd or self.work_dir,
+                    timeout=timeout,
+                )
+            except subprocess.TimeoutExpired as e:
+                stdout = e.stdout.decode("utf-8", "replace") if isinstance(e.stdout, bytes) else (e.stdout or "")
+                result = subprocess.CompletedProcess(cmd, EXIT_INTERRUPTED, stdout, f"\nTimed out after {timeout:.1f}s\n")
+            span.set(returncode=result.returncode, output_chars=len(result.stdout) + len(result.stderr))
+            return result
+
+    def run_tests(self, test_filename: str, work_dir: Optional[str] = None, timeout: Optional[float] = None, args: Optional[list] = None) -> TestRunResult:
+        """
+        Runs pytest on a test file and returns the exit code, combined output and per-test outcomes.
+        `args` replaces the default `[test_filename]` arguments (e.g. to select node ids).
+        """
+        worker = self._ensure_worker()
+        with get_tracer().span("pytest", kind="tests", runner="warm" if worker else "cold") as span:
+            result = self._run_tests(args or [test_filename], work_dir or self.work_dir, timeout)
+            span.set(
+                exit_code=result.exit_code,
+                passed=result.count("passed"),
+                failed=result.count("failed") + result.count("error"),
+                output_chars=len(result.output),
+            )
+            return result
+
+    def _run_tests(self, args: list, work_dir: str, timeout: Optional[float] = None) -> TestRunResult:
+        if self.test_worker:
+            logger.info(f"{Fore.YELLOW}Executing: pytest {' '.join(args)} (warm worker)")
+            return self.test_worker.run(work_dir, args, timeout)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            report_path = os.path.join(tmp, "report.xml")
+            start = time.perf_counter()
+            proc = self.run_command(["pytest", *args, f"--junitxml={report_path}"], cwd=work_dir, timeout=timeout)
+            duration = time.perf_counter() - start
+            tests = []
+            if os.path.exists(report_path):
+                tests = parse_junit_xml(read_file(report_path))
+        return TestRunResult(
+            exit_code=proc.returncode,
+            output=proc.stdout + proc.stderr,
+            tests=tests,
+            duration=duration,
         )
-        return result.stdout + result.stderr
 
-    def start(self, goal: str):
-        logger.info(f"{Fore.CYAN}{Style.BRIGHT}=== Starting Orchestral Agent System ===")
-        logger.info(f"Goal: {goal}")
-        
-        # Ensure work dir exists
-        os.makedirs(WORK_DIR, exist_ok=True)
+    def _suite_key(self, test_filename: str, work_dir: Optional[str] = None) -> str:
+        return suite_key(read_file(os.path.join(work_dir or self.work_dir, test_filename)))
+
+    def record_results(self, test_filename: str, result: TestRunResult):
+        """Adds a full run's per-test outcomes to the test index."""
+        self.test_index.update(self._suite_key(test_filename), result)
+
+    def run_tests_incremental(self, test_filename: str, work_dir: Optional[str] = None, timeout: Optional[float] = None, stop_early: bool = True, failing: Optional[List[str]] = None) -> TestRunResult:
+        """
+        Runs the tests that failed last time first, and the rest of the suite only once
+        those pass. With `stop_early`, the first run stops at its first failure (`-x`);
+        without it, every previously failing test runs, so the output carries all of their
+        failures (for ranking fix candidates and for the next Fixer prompt). Without usable
+        history for this version of the test file, or if the selection run is ambiguous,
+        the whole suite runs.
+
+        `failing` is a snapshot of the previously failing tests taken by the caller. With
+        it, the index is neither read nor updated, so concurrent callers all run the same
+        tests and don't see each other's results.
+        """
+        suite = self._suite_key(test_filename, work_dir)
+        record = failing is None
+        if record:
+            failing = self.test_index.failing(suite)
+
+        def remember(result: TestRunResult):
+            if record:
+                self.test_index.update(suite, result)
+
+        if not failing:
+            result = self.run_tests(test_filename, work_dir, timeout)
+            remember(result)
+            return result
+
+        known = self.test_index.size()
+        first = self.run_tests(test_filename, work_dir, timeout, args=failing + (["-x"] if stop_early else []))
+        verdict = judge_results(first)
+        if verdict is None:
+            # e.g. a selected node id no longer exists
+            result = self.run_tests(test_filename, work_dir, timeout)
+            remember(result)
+            return result
+        remember(first)
+        if not verdict.success:
+            skipped = known - len(first.tests)
+            self.test_index.record_incremental(len(first.tests), skipped, stopped_early=True)
+            current_span().set(incremental=True, early_stop=True, tests_skipped=skipped)
+            first.output += f"\n(Incremental run: previously failing tests ran first; {skipped} other tests were not run.)\n"
+            return first
+
+        deselect = [arg for nodeid in failing for arg in ("--deselect", nodeid)]
+        rest = self.run_tests(test_filename, work_dir, timeout, args=[test_filename] + deselect)
+        remember(rest)
+        self.test_index.record_incremental(len(first.tests) + len(rest.tests), 0, stopped_early=False)
+        current_span().set(incremental=True, early_stop=False)
+        # Every test was deselected: the previously failing ones were the whole suite.
+        exit_code = EXIT_OK if rest.exit_code == EXIT_NO_TESTS else rest.exit_code
+        return TestRunResult(
+            exit_code=exit_code,
+            output=first.output + rest.output,
+            tests=first.tests + rest.tests,
+            duration=first.duration + rest.duration,
+        )
 
-        # 1. PLANNER
+    def _buggy_path(self, spec: PlannerSpec) -> str:
+        return os.path.join(self.work_dir, spec.filename.replace(".py", "_buggy.py"))
+
+    def _fixed_path(self, spec: PlannerSpec) -> str:
+        return os.path.join(self.work_dir, spec.filename.replace(".py", "_fixed.py"))
+
+    def plan(self, goal: str) -> PlannerSpec:
         logger.info(f"\n{Fore.BLUE}--- Phase 1: Planning ---")
         spec = self.planner.run(goal)
         logger.info(f"Plan created: {spec.filename} -> {spec.function_name}")
         logger.info(f"Steps: {spec.steps}")
+        return spec
+
+    def _stream_into(self, label: str, path: str, generate):
+        """
+        Calls `generate(on_content, stream_stats)`; when streaming is on, the generated
+        file is written to `path` while the model is still producing it.
+        """
+        if not self.stream:
+            return generate(None, None)
+        stats = {}
+        with StreamingFileWriter(path) as writer:
+            out = generate(writer.write, stats)
+        logger.info(
+            f"{label} streamed {writer.bytes_written} chars to {path}: first token after "
+            f"{stats.get('ttft', 0.0):.2f}s, {stats.get('tokens_per_sec', 0.0):.0f} tokens/s"
+        )
+        return out
+
+    def _generate_checked(self, label: str, generate, check, feedback=None, cancel: Optional[threading.Event] = None):
+        """
+        Calls `generate(feedback)` until `check(output)` finds no problems, re-requesting
+        with the problems as feedback up to PREFLIGHT_RETRIES times. A file that still
+        fails is returned anyway and left for pytest to report. Returns None without
+        another request once `cancel` is set.
+        """
+        for attempt in range(PREFLIGHT_RETRIES + 1):
+            if cancel is not None and cancel.is_set():
+                return None
+            out = generate(feedback)
+            problems = check(out)
+            if not problems:
+                if feedback:
+                    self.preflight.avoided()
+                return out
+            logger.warning(f"{Fore.RED}Pre-flight check rejected the {label} output: {'; '.join(problems)}")
+            current_span().add("preflight_rejections", 1)
+            feedback = problems
+        logger.warning(f"{Fore.RED}{label} output still fails the pre-flight checks; testing it anyway.")
+        return out
+
+    def _check_code(self, spec: PlannerSpec, signature: Optional[str] = None):
+        return lambda out: self.preflight.check_code(out.file_content, spec.function_name, spec.filename, signature)
+
+    def _check_tests(self, spec: PlannerSpec, test_filename: str, module_code: Optional[str] = None):
+        module_name = spec.filename.replace(".py", "")
+        return lambda out: self.preflight.check_tests(out.test_content, module_name, spec.function_name, module_code, test_filename)
+
+    def check_consistency(self, spec: PlannerSpec, code: str, test_filename: str):
+        """Makes sure the tests only import names the module defines, re-requesting the tests if not."""
+        test_path = os.path.join(self.work_dir, test_filename)
+        check = self._check_tests(spec, test_filename, code)
+        problems = check(TesterOutput(test_content=read_file(test_path)))
+        if not problems:
+            return
+        logger.warning(f"{Fore.RED}Pre-flight check rejected the tests: {'; '.join(problems)}")
+        tester_out = self._generate_checked("Tester", lambda feedback: self.tester.run(spec, feedback=feedback), check, feedback=problems)
+        write_file(test_path, tester_out.test_content)
+
+    def code(self, spec: PlannerSpec) -> CoderOutput:
+        code_path = os.path.join(self.work_dir, spec.filename)
+        if self.bug_mode == "mutation":
+            logger.info(f"\n{Fore.BLUE}--- Phase 2: Coding (Correct) ---")
+            coder_out = self._generate_checked(
+                "Coder",
+                lambda feedback: self._stream_into("Coder", code_path, lambda on_content, stats: self.coder.run(spec, on_content, stats, inject_bug=False, feedback=feedback)),
+                self._check_code(spec),
+            )
+            write_file(code_path, coder_out.file_content)
+            logger.info(f"Code written to {code_path}")
+            return coder_out
 
-        # 2. CODER (Generates Buggy Code)
         logger.info(f"\n{Fore.BLUE}--- Phase 2: Coding (Intentional Bug) ---")
-        coder_out = self.coder.run(spec)
-        code_path = os.path.join(WORK_DIR, spec.filename)
-        buggy_path = os.path.join(WORK_DIR, spec.filename.replace(".py", "_buggy.py"))
+        buggy_path = self._buggy_path(spec)
+        coder_out = self._generate_checked(
+            "Coder",
+            lambda feedback: self._stream_into("Coder", code_path, lambda on_content, stats: self.coder.run(spec, on_content, stats, feedback=feedback)),
+            self._check_code(spec),
+        )
         
         # Save both for history
         write_file(code_path, coder_out.file_content)
         write_file(buggy_path, coder_out.file_content)
         logger.info(f"Code written to {code_path} (Backup: {buggy_path})")
+        return coder_out
 
-        # 3. TESTER
+    def write_tests(self, spec: PlannerSpec) -> str:
         logger.info(f"\n{Fore.BLUE}--- Phase 3: Writing Tests ---")
-        tester_out = self.tester.run(spec)
         test_filename = f"test_{spec.filename}"
-        test_path = os.path.join(WORK_DIR, test_filename)
+        test_path = os.path.join(self.work_dir, test_filename)
+        tester_out = self._generate_checked(
+            "Tester",
+            lambda feedback: self._stream_into("Tester", test_path, lambda on_content, stats: self.tester.run(spec, on_content, stats, feedback=feedback)),
+            self._check_tests(spec, test_filename),
+        )
         write_file(test_path, tester_out.test_content)
         logger.info(f"Tests written to {test_path}")
+        return test_filename
 
-        # 4. INITIAL TEST RUN (Expect Fail)
+    def initial_test(self, spec: PlannerSpec, coder_out: CoderOutput, test_filename: str) -> TestRunResult:
         logger.info(f"\n{Fore.BLUE}--- Phase 4: Initial Testing ---")
-        test_output = self.run_command(["pytest", test_filename])
+        self.check_consistency(spec, coder_out.file_content, test_filename)
+        test_result = self.run_tests(test_filename)
+        self.record_results(test_filename, test_result)
+        test_output = test_result.output
         logger.info("Test Output (Truncated):")
-        print(test_output[:500] + "..." if len(test_output) > 500 else test_output)
+        logger.info(test_output[:500] + "..." if len(test_output) > 500 else test_output)
+        return test_result
+
+    def inject_bug(self, spec: PlannerSpec, coder_out: CoderOutput, test_filename: str) -> TestRunResult:
+        """
+        Creates the buggy version locally from the Coder's correct code. Mutants are tested
+        in parallel and the first one the tests kill becomes the buggy file; its test run
+        doubles as the initial test. Falls back to an LLM-injected bug if none is killed.
+        """
+        logger.info(f"\n{Fore.BLUE}--- Phase 4: Bug Injection (Mutation) ---")
+        code_path = os.path.join(self.work_dir, spec.filename)
+        start = time.perf_counter()
+
+        self.check_consistency(spec, coder_out.file_content, test_filename)
+        baseline = self.run_tests(test_filename)
+        verdict = judge_results(baseline)
+        if verdict is None or not verdict.success:
+            logger.warning(f"{Fore.RED}The correct code already fails its tests; using it as the buggy version.")
+            write_file(self._buggy_path(spec), coder_out.file_content)
+            self.record_results(test_filename, baseline)
+            return baseline
+
+        mutants = generate_mutants(coder_out.file_content, spec.function_name, limit=MAX_MUTANTS)
+        timeout = max(MUTANT_TIMEOUT_FLOOR, baseline.duration * MUTANT_TIMEOUT_FACTOR)
+        stop = threading.Event()
+        evaluated = survived = 0
+        killed = None  # (mutant, result)
+
+        def attempt(mutant):
+            if stop.is_set():
+                return mutant, None
+            return mutant, self._evaluate_candidate(spec, test_filename, mutant.code, timeout=timeout)
+
+        pool = ThreadPoolExecutor(max_workers=self.mutation_workers)
+        futures = [pool.submit(contextvars.copy_context().run, attempt, mutant) for mutant in mutants]
+        try:
+            for future in as_completed(futures):
+                mutant, result = future.result()
+                if result is None:
+                    continue
+                evaluated += 1
+                verdict = judge_results(result)
+                # Timeouts and crashes are not useful bugs; only clean test failures count as killed.
+                if verdict is not None and not verdict.success:
+                    killed = (mutant, result)
+                    stop.set()
+                    break
+                survived += 1
+        finally:
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        elapsed = time.perf_counter() - start
+        self.bug_stats = {"mutants": len(mutants), "evaluated": evaluated, "survived": survived, "seconds": elapsed}
+        current_span().set(**{f"mutation_{key}": value for key, value in self.bug_stats.items()})
+
+        if killed is None:
+            logger.warning(f"{Fore.RED}No mutant was killed by the tests ({evaluated} tried); asking the Coder for a bug instead.")
+            coder_out = self.coder.run(spec)
+            write_file(code_path, coder_out.file_content)
+            write_file(self._buggy_path(spec), coder_out.file_content)
+            result = self.run_tests(test_filename)
+            self.record_results(test_filename, result)
+            return result
 
-        # 5. JUDGE (Check failure)
-        judge_verdict = self.judge.run(test_output)
+        mutant, result = killed
+        self.record_results(test_filename, result)
+        write_file(code_path, mutant.code)
+        write_file(self._buggy_path(spec), mutant.code)
+        logger.info(
+            f"{Fore.GREEN}Injected bug ({mutant.description}) in {elapsed * 1000:.0f}ms: "
+            f"{evaluated} mutants tested, {survived} survived and were discarded"
+        )
+        return result
+
+    def initial_judgment(self, test_result: TestRunResult) -> JudgeOutput:
+        judge_verdict = self.judge.judge(test_result)
         if judge_verdict.success:
             logger.warning(f"{Fore.RED}WARNING: Tests passed unexpectedly! The Coder failed to insert a bug.")
         else:
             logger.info(f"{Fore.GREEN}Confirmation: Tests failed as expected. Proceeding to fix.")
+        return judge_verdict
+
+    def _evaluate_candidate(self, spec: PlannerSpec, test_filename: str, code: str, timeout: Optional[float] = None, incremental: bool = False, stop_early: bool = True, failing: Optional[List[str]] = None) -> TestRunResult:
+        """Tests a candidate fix (or mutant) in its own scratch workspace so candidates never clobber each other."""
+        with tempfile.TemporaryDirectory(prefix="fix_candidate_") as scratch:
+            shutil.copy(os.path.join(self.work_dir, test_filename), scratch)
+            write_file(os.path.join(scratch, spec.filename), code)
+            if incremental:
+                return self.run_tests_incremental(test_filename, work_dir=scratch, timeout=timeout, stop_early=stop_early, failing=failing)
+            return self.run_tests(test_filename, work_dir=scratch, timeout=timeout)
+
+    def compact_output(self, spec: PlannerSpec, test_output: str) -> str:
+        """Summarizes pytest output to fit `prompt_budget` tokens (no-op when the budget is unset)."""
+        if not self.prompt_budget:
+            return test_output
+        compact = summarize_failures(test_output, (spec.filename, f"test_{spec.filename}"), self.prompt_budget)
+        current_span().set(raw_output_chars=len(test_output), compact_output_chars=len(compact))
+        return compact
+
+    def generate_fix(self, spec: PlannerSpec, current_code: str, test_output: str, temperature: float = 0.0, hint: str = None, on_content=None, stream_stats: dict = None, cancel: Optional[threading.Event] = None, signature: Optional[str] = None) -> Optional[FixerOutput]:
+        """
+        Asks the Fixer for a fix in the configured mode. Patch mode applies the returned
+        search/replace edits locally and falls back to a full-file fix if they do not apply.
+        The fix must keep `signature` (by default, that of `current_code`). Returns None
+        if `cancel` is set before a fix was accepted.
+        """
+        test_output = self.compact_output(spec, test_output)
+        if signature is None:
+            signature = function_signature(current_code, spec.function_name)
+        return self._generate_checked(
+            "Fixer",
+            lambda feedback: self._request_fix(spec, current_code, test_output, temperature, hint, on_content, stream_stats, feedback),
+            self._check_code(spec, signature),
+            cancel=cancel,
+        )
+
+    def _request_fix(self, spec: PlannerSpec, current_code: str, test_output: str, temperature: float, hint: str, on_content, stream_stats: dict, feedback) -> FixerOutput:
+        if self.fix_mode == "patch":
+            try:
+                patch = self.fixer.run_patch(spec, current_code, test_output, temperature=temperature, hint=hint, feedback=feedback)
+                patched = apply_edits(current_code, patch.edits, spec.filename)
+                logger.info(f"Applied {len(patch.edits)} edit(s) from the Fixer")
+                current_span().set(fix_mode="patch", edits=len(patch.edits))
+                return FixerOutput(file_content=patched)
+            except ValueError as e:  # PatchError, malformed JSON or schema mismatch
+                logger.warning(f"{Fore.RED}Patch could not be applied ({e}); falling back to a full-file fix.")
+                current_span().set(patch_fallback=True)
+        current_span().set(fix_mode="full")
+        return self.fixer.run(spec, current_code, test_output, temperature=temperature, hint=hint, on_content=on_content, stream_stats=stream_stats, feedback=feedback)
+
+    def fix_search(self, spec: PlannerSpec, test_filename: str, current_code: str, test_output: str, signature: Optional[str] = None) -> FixerOutput:
+        """
+        Asks for `fix_candidates` fixes at once (varying temperature and strategy), tests each
+        in parallel and returns the first one that passes. If none passes, the best failing
+        candidate's code and output seed the next of up to `fix_rounds` rounds.
+        """
+        start = time.perf_counter()
+        evaluated = cancelled = 0
+        best = None  # (failing tests, candidate, result)
+        suite = self._suite_key(test_filename)
+
+        for round_no in range(1, self.fix_rounds + 1):
+            stop = threading.Event()
+            # Every candidate of a round is scored on the same previously failing tests;
+            # only the round's winner (or best failing candidate) is recorded in the index.
+            failing = self.test_index.failing(suite) or []
+            round_best = None
+
+            def attempt(index: int, code=current_code, output=test_output, failing=failing):
+                # Once a candidate passes, the others stop before their next LLM request
+                # and between their LLM call and their test run.
+                temperature, hint = fix_strategy(index)
+                candidate = self.generate_fix(spec, code, output, temperature=temperature, hint=hint, cancel=stop, signature=signature)
+                if candidate is None or stop.is_set():
+                    return candidate, None
+                # No -x: candidates are ranked by their failing tests, and the best one's
+                # output seeds the next round's Fixer prompt.
+                return candidate, self._evaluate_candidate(spec, test_filename, candidate.file_content, incremental=True, stop_early=False, failing=failing)
 
-        # 6. FIXER
+            pool = ThreadPoolExecutor(max_workers=self.fix_candidates)
+            futures = [pool.submit(contextvars.copy_context().run, attempt, i) for i in range(self.fix_candidates)]
+            try:
+                for future in as_completed(futures):
+                    try:
+                        candidate, result = future.result()
+                    except Exception as e:
+                        logger.warning(f"{Fore.RED}Fix candidate failed: {e}")
+                        continue
+                    if result is None:
+                        cancelled += 1
+                        continue
+                    evaluated += 1
+                    verdict = judge_results(result)
+                    if verdict is not None and verdict.success:
+                        # First green wins; the other candidates are cancelled.
+                        stop.set()
+                        self.record_results(test_filename, result)
+                        elapsed = time.perf_counter() - start
+                        self.fix_stats = {
+                            "time_to_green": elapsed,
+                            "candidates_evaluated": evaluated,
+                            "candidates_cancelled": cancelled + sum(not f.done() for f in futures),
+                            "candidates_per_second": evaluated / elapsed if elapsed else 0.0,
+                            "rounds": round_no,
+                        }
+                        logger.info(
+                            f"{Fore.GREEN}Round {round_no}: passing fix found after {elapsed:.2f}s "
+                            f"({evaluated} candidates evaluated, {evaluated / elapsed:.2f}/s, {self.fix_stats['candidates_cancelled']} cancelled)"
+                        )
+                        return candidate
+                    failed = result.count("failed") + result.count("error") if result.tests else float("inf")
+                    if best is None or failed < best[0]:
+                        best = round_best = (failed, candidate, result)
+            finally:
+                stop.set()
+                pool.shutdown(wait=False, cancel_futures=True)
+
+            if best is None:
+                raise RuntimeError("No fix candidate could be generated.")
+            if round_best is not None:
+                self.record_results(test_filename, round_best[2])
+            logger.info(f"{Fore.YELLOW}Round {round_no}: no passing candidate (best has {best[0]} failing tests)")
+            current_code, test_output = best[1].file_content, best[2].output
+
+        elapsed = time.perf_counter() - start
+        self.fix_stats = {
+            "time_to_green": None,
+            "candidates_evaluated": evaluated,
+            "candidates_cancelled": cancelled,
+            "candidates_per_second": evaluated / elapsed if elapsed else 0.0,
+            "rounds": self.fix_rounds,
+        }
+        return best[1]
+
+    def fix(self, spec: PlannerSpec, test_result: TestRunResult, test_filename: str, coder_out: CoderOutput) -> FixerOutput:
         logger.info(f"\n{Fore.BLUE}--- Phase 5: Fixing ---")
+        code_path = os.path.join(self.work_dir, spec.filename)
         # Read the current broken code
         current_code = read_file(code_path)
-        fixer_out = self.fixer.run(spec, current_code, test_output)
+        # Fixes keep the signature the Coder wrote, not whatever the injected bug left.
+        signature = function_signature(coder_out.file_content, spec.function_name)
+        if self.fix_candidates > 1 or self.fix_rounds > 1:
+            fixer_out = self.fix_search(spec, test_filename, current_code, test_result.output, signature)
+        elif self.fix_mode == "patch":
+            fixer_out = self.generate_fix(spec, current_code, test_result.output, signature=signature)
+        else:
+            fixer_out = self._stream_into(
+                "Fixer", code_path,
+                lambda on_content, stats: self.generate_fix(spec, current_code, test_result.output, on_content=on_content, stream_stats=stats, signature=signature),
+            )
         
         # Save fixed version
         write_file(code_path, fixer_out.file_content) # Overwrite main file for testing
-        fixed_path = os.path.join(WORK_DIR, spec.filename.replace(".py", "_fixed.py"))
+        fixed_path = self._fixed_path(spec)
         write_file(fixed_path, fixer_out.file_content) # Save snapshot
         
         logger.info(f"Fixed code written to {code_path} (Snapshot: {fixed_path})")
+        return fixer_out
 
-        # 7. VERIFICATION TEST RUN
+    def verify(self, fixer_out: FixerOutput, test_filename: str) -> TestRunResult:
         logger.info(f"\n{Fore.BLUE}--- Phase 6: Verification Testing ---")
-        final_test_output = self.run_command(["pytest", test_filename])
+        final_result = self.run_tests_incremental(test_filename)
+        final_test_output = final_result.output
         logger.info("Final Test Output (Truncated):")
-        print(final_test_output[:500] + "..." if len(final_test_output) > 500 else final_test_output)
+        logger.info(final_test_output[:500] + "..." if len(final_test_output) > 500 else final_test_output)
+        return final_result
 
-        # 8. FINAL JUDGEMENT
+    def final_judgment(self, final_result: TestRunResult) -> JudgeOutput:
         logger.info(f"\n{Fore.BLUE}--- Phase 7: Final Judgment ---")
-        final_verdict = self.judge.run(final_test_output)
-        
+        return self.judge.judge(final_result)
+
+    def _phase_files(self, name: str, spec: Optional[PlannerSpec]) -> dict:
+        """The workspace files a finished phase produced (relative path -> content), for its checkpoint."""
+        if spec is None:
+            return {}
+        code = spec.filename
+        buggy = os.path.basename(self._buggy_path(spec))
+        fixed = os.path.basename(self._fixed_path(spec))
+        tests = f"test_{spec.filename}"
+        produced = {
+            "coding": [code, buggy],
+            "writing_tests": [tests],
+            "initial_test": [tests],  # the consistency check may have replaced the tests
+            "bug_injection": [code, buggy, tests],
+            "fixing": [code, fixed],
+        }.get(name, [])
+        return {
+            relpath: read_file(os.path.join(self.work_dir, relpath))
+            for relpath in produced
+            if os.path.exists(os.path.join(self.work_dir, relpath))
+        }
+
+    def _open_run(self, goal: Optional[str], resume: Optional[str]):
+        """Returns (manifest, completed phase results) for a new run or the run being resumed."""
+        store = RunStore(self.work_dir)
+        if not resume:
+            previous = store.latest_for_goal(goal)
+            if previous is not None and previous.status != "complete":
+                logger.warning(
+                    f"{Fore.YELLOW}Run {previous.run_id} of this goal stopped after {len(previous.data['phases'])} phases; "
+                    f"use --resume {previous.run_id} to continue it instead."
+                )
+            options = {"bug_mode": self.bug_mode, "fix_mode": self.fix_mode}
+            return store.create(goal, options), {}
+
+        if resume == "last":
+            manifest = store.latest_for_goal(goal or "")
+            if manifest is None:
+                raise ValueError(f"No earlier run of this goal in {self.work_dir}")
+        else:
+            manifest = store.load(resume)
+        if manifest.data["options"].get("bug_mode", self.bug_mode) != self.bug_mode:
+            logger.warning(f"{Fore.YELLOW}Run {manifest.run_id} used --bug-mode {manifest.data['options']['bug_mode']}; phases that differ will run again.")
+        completed = manifest.completed()
+        restored = manifest.restore_files(self.work_dir)
+        manifest.data["status"] = "running"
+        manifest.save()
+        logger.info(
+            f"{Fore.CYAN}Resuming run {manifest.run_id}: {len(completed)} phases already done "
+            f"({', '.join(completed) or 'none'}), {restored} files restored"
+        )
+        return manifest, completed
+
+    def start(self, goal: Optional[str] = None, resume: Optional[str] = None) -> OrchestrationResult:
+        """
+        Runs the pipeline for `goal`. Every finished phase is checkpointed to a run
+        manifest; `resume` (a run id, or "last" for the latest run of `goal`) skips
+        the phases that run already completed.
+        """
+        # Ensure work dir exists
+        os.makedirs(self.work_dir, exist_ok=True)
+        # Starts importing pytest while the LLM phases run.
+        self._ensure_worker()
+        manifest, completed = self._open_run(goal, resume)
+        goal = manifest.goal
+
+        logger.info(f"{Fore.CYAN}{Style.BRIGHT}=== Starting Orchestral Agent System ===")
+        logger.info(f"Goal: {goal}")
+        logger.info(f"Run: {manifest.run_id}")
+
+        # Coder and Tester only need the spec, so they run concurrently; the
+        # initial judgment likewise overlaps with the Fixer.
+        scheduler = PhaseScheduler()
+        scheduler.add("planning", lambda: self.plan(goal))
+        scheduler.add("coding", self.code, deps=["planning"])
+        scheduler.add("writing_tests", self.write_tests, deps=["planning"])
+        first_test = "initial_test"
+        if self.bug_mode == "mutation":
+            # The test run of the killed mutant doubles as the initial test.
+            first_test = "bug_injection"
+            scheduler.add("bug_injection", self.inject_bug, deps=["planning", "coding", "writing_tests"])
+        else:
+            scheduler.add("initial_test", self.initial_test, deps=["planning", "coding", "writing_tests"])
+        scheduler.add("initial_judgment", self.initial_judgment, deps=[first_test])
+        if first_test in completed:
+            # Seed the test index from the checkpointed initial run, so verification stays incremental.
+            self.record_results(completed["writing_tests"], completed[first_test])
+        scheduler.add("fixing", self.fix, deps=["planning", first_test, "writing_tests", "coding"])
+        scheduler.add("verification", self.verify, deps=["fixing", "writing_tests"])
+        scheduler.add("final_judgment", self.final_judgment, deps=["verification"])
+
+        def checkpoint(name, result, duration):
+            manifest.record_phase(name, result, duration, self._phase_files(name, scheduler.results.get("planning")))
+
+        with get_tracer().span("run", kind="run", goal=goal, work_dir=self.work_dir, run_id=manifest.run_id, resumed_phases=len(completed)) as run_span:
+            try:
+                results = scheduler.run(completed, on_result=checkpoint)
+            except BaseException as e:
+                manifest.finish("failed", f"{type(e).__name__}: {e}")
+                logger.error(f"{Fore.RED}Run {manifest.run_id} stopped ({type(e).__name__}: {e}); continue it with --resume {manifest.run_id}")
+                raise
+            run_span.set(success=results["final_judgment"].success)
+        manifest.finish("complete")
+
+        spec = results["planning"]
+        final_verdict = results["final_judgment"]
         if final_verdict.success:
             logger.info(f"{Fore.GREEN}{Style.BRIGHT}SUCCESS: {final_verdict.reason}")
             logger.info(f"\n{Fore.CYAN}=== Generated Files ===")
-            logger.info(f"Buggy Code: {os.path.abspath(buggy_path)}")
-            logger.info(f"Fixed Code: {os.path.abspath(fixed_path)}")
-            logger.info(f"Test Suite: {os.path.abspath(test_path)}")
+            logger.info(f"Buggy Code: {os.path.abspath(self._buggy_path(spec))}")
+            logger.info(f"Fixed Code: {os.path.abspath(self._fixed_path(spec))}")
+            logger.info(f"Test Suite: {os.path.abspath(os.path.join(self.work_dir, results['writing_tests']))}")
         else:
             logger.error(f"{Fore.RED}{Style.BRIGHT}FAILURE: {final_verdict.reason}")
 
+        logger.info(f"\n{Fore.CYAN}=== Phase Timings ===")
+        for line in scheduler.summary():
+            logger.info(line)
+        if scheduler.skipped:
+            logger.info(f"Restored from checkpoint: {', '.join(scheduler.skipped)}")
+        logger.info(f"Pre-flight: {self.preflight.summary()}")
+        logger.info(f"Test index: {self.test_index.summary()}")
+
+        return OrchestrationResult(
+            goal=goal,
+            run_id=manifest.run_id,
+            success=final_verdict.success,
+            reason=final_verdict.reason,
+            work_dir=self.work_dir,
+            filename=spec.filename,
+            duration=scheduler.wall_time,
+            phase_timings={name: end - start for name, (start, end) in scheduler.timings.items()},
+            fix_stats=self.fix_stats,
+            preflight_stats=self.preflight.stats,
+        )
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Orchestral Agent Prototype")
     parser.add_argument("--goal", type=str, help="The coding task to perform.")
     parser.add_argument("--mock", action="store_true", help="Use mock LLM responses for demonstration without API key.")
+    parser.add_argument("--batch", type=str, help="Run every goal in a JSONL file ('-' for stdin) and stream JSONL results.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Number of goals to run at once in batch mode.")
+    parser.add_argument("--batch-dir", type=str, default=os.path.join(WORK_DIR, "batch"), help="Parent directory of the per-goal batch workspaces.")
+    parser.add_argument("--batch-output", type=str, default="-", help="Where to write batch JSONL results ('-' for stdout).")
+    parser.add_argument("--fix-candidates", type=int, default=1, help="Number of candidate fixes to generate and test in parallel.")
+    parser.add_argument("--fix-mode", choices=["full", "patch"], default="full", help="Have the Fixer return the whole file or search/replace edits.")
+    parser.add_argument("--bug-mode", choices=["llm", "mutation"], default="llm", help="Let the Coder write the bug, or write correct code and inject the bug locally by AST mutation.")
+    parser.add_argument("--prompt-budget", type=int, default=DEFAULT_PROMPT_BUDGET, help="Token budget for the pytest failure summary sent to the Fixer and Judge (0 sends the raw output).")
+    parser.add_argument("--fix-rounds", type=int, default=1, help="Fix rounds; each round is seeded with the best failing candidate.")
+    parser.add_argument("--mutation-workers", type=int, default=DEFAULT_MUTATION_WORKERS, help="Mutants tested in parallel with --bug-mode mutation.")
+    parser.add_argument("--stream", action="store_true", help="Stream LLM responses and write generated files while they are produced.")
+    parser.add_argument("--trace", type=str, default=os.path.join(WORK_DIR, "trace.jsonl"), help="JSONL file that receives one span per phase, LLM call and subprocess.")
+    parser.add_argument("--no-trace", action="store_true", help="Disable tracing and the end-of-run summary table.")
+    parser.add_argument("--no-llm-judge", action="store_true", help="Never fall back to the LLM judge for ambiguous pytest runs.")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the LLM response cache (no reads, no writes).")
+    parser.add_argument("--refresh-cache", action="store_true", help="Ignore cached LLM responses but store the fresh ones.")
+    parser.add_argument("--cache-dir", type=str, default=DEFAULT_CACHE_DIR, help="Directory of the on-disk LLM response cache.")
+    parser.add_argument("--base-url", type=str, help="Send LLM calls to this OpenAI-compatible endpoint (sets LLM_BASE_URL).")
+    parser.add_argument("--resume", type=str, metavar="RUN_ID", help="Continue a stopped run from its first incomplete phase ('last' for the latest run of --goal).")
+    parser.add_argument("--cold-tests", action="store_true", help="Run each pytest session in a fresh subprocess instead of the warm worker.")
     args = parser.parse_args()
+    if args.base_url:
+        os.environ["LLM_BASE_URL"] = args.base_url
+
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(cache_dir=args.cache_dir, refresh=args.refresh_cache)
+        set_response_cache(cache)
+
+    tracer = Tracer(enabled=False)
+    if not args.no_trace:
+        os.makedirs(os.path.dirname(args.trace) or ".", exist_ok=True)
+        tracer = Tracer(path=args.trace)
+    set_tracer(tracer)
+
+    options = dict(
+        use_mock=args.mock,
+        llm_judge_fallback=not args.no_llm_judge,
+        warm_tests=not args.cold_tests,
+        fix_candidates=args.fix_candidates,
+        fix_rounds=args.fix_rounds,
+        stream=args.stream,
+        fix_mode=args.fix_mode,
+        prompt_budget=args.prompt_budget,
+        bug_mode=args.bug_mode,
+        mutation_workers=args.mutation_workers,
+    )
+
+    if args.batch:
+        import asyncio
+        from functools import partial
+        from batch import read_goals, run_batch, format_summary
+
+        # Per-goal logs would interleave; only warnings and the final summary are shown.
+        logger.setLevel(logging.WARNING)
+        source = sys.stdin if args.batch == "-" else open(args.batch, "r", encoding="utf-8")
+        out = sys.stdout if args.batch_output == "-" else open(args.batch_output, "w", encoding="utf-8")
+        try:
+            with source:
+                goals = read_goals(source)
+            summary = asyncio.run(run_batch(
+                goals,
+                partial(Orchestrator, **options),
+                concurrency=args.concurrency,
+                batch_dir=args.batch_dir,
+                out=out,
+                warm_tests=not args.cold_tests,
+            ))
+            logging.getLogger("Batch").warning(format_summary(summary))
+            if tracer.enabled:
+                logging.getLogger("Batch").warning("\n".join(tracer.summary()))
+            if cache and not args.mock:
+                logging.getLogger("Batch").warning(f"LLM cache: {cache.summary()}")
+        finally:
+            if out is not sys.stdout:
+                out.close()
+            if cache:
+                cache.close()
+            tracer.close()
+        sys.exit(0)
 
-    orchestrator = Orchestrator(use_mock=args.mock)
+    orchestrator = Orchestrator(**options)
     
     # improved input handling
     goal = args.goal
-    if not goal:
+    if not goal and (not args.resume or args.resume == "last"):
         print(f"\n{Fore.GREEN}Please enter your coding goal:")
         goal = input(f"{Fore.RESET}> ")
     
-    orchestrator.start(goal)
+    try:
+        orchestrator.start(goal, resume=args.resume)
+        if cache and not args.mock:
+            logger.info(f"\n{Fore.CYAN}=== LLM Cache ===")
+            logger.info(cache.summary())
+        limiter = getattr(orchestrator.planner.llm, "rate_limiter", None)
+        if limiter:
+            logger.info(f"\n{Fore.CYAN}=== Rate Limiter ===")
+            logger.info(limiter.summary())
+        if tracer.enabled:
+            logger.info(f"\n{Fore.CYAN}=== Trace Summary ({args.trace}) ===")
+            for line in tracer.summary():
+                logger.info(line)
+    finally:
+        orchestrator.close()
+        if cache:
+            cache.close()
+        tracer.close()
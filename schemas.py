@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class PlannerSpec(BaseModel):
     filename: str
@@ -16,6 +16,40 @@ class TesterOutput(BaseModel):
 class FixerOutput(BaseModel):
     file_content: str
 
+class SearchReplaceEdit(BaseModel):
+    search: str
+    replace: str
+
+class FixerPatchOutput(BaseModel):
+    edits: List[SearchReplaceEdit]
+
 class JudgeOutput(BaseModel):
     success: bool
     reason: str
+
+class TestCaseResult(BaseModel):
+    nodeid: str
+    outcome: str  # "passed", "failed", "error" or "skipped"
+    duration: float = 0.0
+    message: Optional[str] = None
+
+class TestRunResult(BaseModel):
+    exit_code: int
+    output: str
+    tests: List[TestCaseResult] = []
+    duration: float = 0.0
+
+    def count(self, outcome: str) -> int:
+        return sum(1 for t in self.tests if t.outcome == outcome)
+
+class OrchestrationResult(BaseModel):
+    goal: str
+    run_id: Optional[str] = None
+    success: bool
+    reason: str
+    work_dir: str
+    filename: str
+    duration: float
+    phase_timings: Dict[str, float] = {}
+    fix_stats: Dict[str, Optional[float]] = {}
+    preflight_stats: Dict[str, int] = {}
@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+from schemas import PlannerSpec, CoderOutput, TesterOutput, FixerOutput, JudgeOutput, TestRunResult
+
+RUNS_DIR = "runs"
+
+# Phase results are stored as {"type": ..., "data": ...} and rebuilt from this table.
+_RESULT_TYPES = {
+    model.__name__: model
+    for model in (PlannerSpec, CoderOutput, TesterOutput, FixerOutput, JudgeOutput, TestRunResult)
+}
+
+def goal_hash(goal: str) -> str:
+    return hashlib.sha256(goal.strip().encode("utf-8")).hexdigest()[:16]
+
+def _encode(result) -> dict:
+    if isinstance(result, BaseModel):
+        return {"type": type(result).__name__, "data": result.model_dump()}
+    return {"type": type(result).__name__, "data": result}
+
+def _decode(entry: dict):
+    model = _RESULT_TYPES.get(entry["type"])
+    return model.model_validate(entry["data"]) if model else entry["data"]
+
+def _write_json(path: str, data):
+    # Write-then-rename, so a crash mid-write never leaves a truncated manifest.
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+class RunManifest:
+    """
+    Checkpoint of one orchestration run: the goal, each completed phase's result and
+    the workspace files that phase produced, saved after every phase.
+    """
+
+    def __init__(self, path: str, data: dict):
+        self.path = path
+        self.data = data
+
+    @property
+    def run_id(self) -> str:
+        return self.data["run_id"]
+
+    @property
+    def goal(self) -> str:
+        return self.data["goal"]
+
+    @property
+    def status(self) -> str:
+        return self.data["status"]
+
+    def completed(self) -> Dict[str, object]:
+        """Results of the completed phases, keyed by phase name."""
+        return {name: _decode(phase["result"]) for name, phase in self.data["phases"].items()}
+
+    def record_phase(self, name: str, result, duration: Optional[float] = None, files: Optional[Dict[str, str]] = None):
+        self.data["phases"][name] = {
+            "result": _encode(result),
+            "duration": duration,
+            "files": files or {},
+            "completed_at": time.time(),
+        }
+        self.save()
+
+    def restore_files(self, work_dir: str) -> int:
+        """
+        Rewrites the files of the completed phases, in completion order, so the workspace
+        matches the last checkpoint (e.g. drops a half-streamed fix). Returns the file count.
+        """
+        restored = 0
+        for phase in self.data["phases"].values():
+            for relpath, content in phase["files"].items():
+                path = os.path.join(work_dir, relpath)
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(content)
+                restored += 1
+        return restored
+
+    def finish(self, status: str, error: Optional[str] = None):
+        self.data["status"] = status
+        self.data["error"] = error
+        self.save()
+
+    def save(self):
+        self.data["updated_at"] = time.time()
+        _write_json(self.path, self.data)
+
+class RunStore:
+    """
+    Persistent run manifests under `<work_dir>/runs/<run_id>/manifest.json`.
+
+    `runs/index/<goal hash>` holds the id of the latest run for that goal, so
+    finding a previous run of a goal is a single file read, however many runs exist.
+    """
+
+    def __init__(self, work_dir: str):
+        self.root = os.path.join(work_dir, RUNS_DIR)
+        self.index_dir = os.path.join(self.root, "index")
+
+    def _manifest_path(self, run_id: str) -> str:
+        return os.path.join(self.root, run_id, "manifest.json")
+
+    def create(self, goal: str, options: Optional[dict] = None) -> RunManifest:
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        os.makedirs(os.path.join(self.root, run_id), exist_ok=True)
+        os.makedirs(self.index_dir, exist_ok=True)
+        manifest = RunManifest(self._manifest_path(run_id), {
+            "run_id": run_id,
+            "goal": goal,
+            "goal_hash": goal_hash(goal),
+            "status": "running",
+            "error": None,
+            "options": options or {},
+            "created_at": time.time(),
+            "phases": {},
+        })
+        manifest.save()
+        with open(os.path.join(self.index_dir, goal_hash(goal)), "w", encoding="utf-8") as f:
+            f.write(run_id)
+        return manifest
+
+    def load(self, run_id: str) -> RunManifest:
+        path = self._manifest_path(run_id)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No run '{run_id}' in {self.root}")
+        with open(path, "r", encoding="utf-8") as f:
+            return RunManifest(path, json.load(f))
+
+    def latest_for_goal(self, goal: str) -> Optional[RunManifest]:
+        """The most recent run of `goal`, or None if it has never been run here."""
+        try:
+            with open(os.path.join(self.index_dir, goal_hash(goal)), "r", encoding="utf-8") as f:
+                run_id = f.read().strip()
+            return self.load(run_id)
+        except FileNotFoundError:
+            return None
@@ -0,0 +1,167 @@
+import os
+import re
+import textwrap
+from typing import Iterable, List, Optional
+
+from llm.rate_limit import estimate_tokens
+
+DEFAULT_PROMPT_BUDGET = 1000  # tokens
+
+_SECTION = re.compile(r"^=+ (.+?) =+$")
+_BLOCK = re.compile(r"^_{3,} (.+?) _{3,}$")
+_FRAME_SEP = re.compile(r"^(_ )+_?\s*$")
+_CAPTURED = re.compile(r"^-{3,} Captured .* -{3,}$")
+_SHORT_LOC = re.compile(r"^(\S+?\.py):(\d+): in (.+)$")
+_LONG_LOC = re.compile(r"^(\S+?\.py):(\d+):(?: ([\w.]+))?\s*$")
+_SUMMARY_ID = re.compile(r"^(FAILED|ERROR) (\S+)")
+_NOISE = ("Use -v to get more diff", "Use -vv to get more diff", "Full diff:")
+
+class _Frame:
+    def __init__(self, path: str = None, lineno: str = None, label: str = ""):
+        self.path = path
+        self.lineno = lineno
+        self.label = label
+        self.source = []   # '>' lines, or the first source line of a short frame
+        self.errors = []   # 'E' lines
+
+def _is_relevant(path: str, relevant_files: Optional[set]) -> bool:
+    if relevant_files:
+        return os.path.basename(path) in relevant_files
+    # Generated code and tests live in the workspace, which pytest prints as relative paths.
+    return not (os.path.isabs(path) or path.startswith("..") or "site-packages" in path)
+
+def _parse_frames(lines: List[str]) -> List[_Frame]:
+    frames, current = [], _Frame()
+    for line in lines:
+        if _FRAME_SEP.match(line):
+            if current.path or current.source or current.errors:
+                frames.append(current)
+            current = _Frame()
+            continue
+        short = _SHORT_LOC.match(line)
+        if short:
+            if current.path or current.source or current.errors:
+                frames.append(current)
+            current = _Frame(short.group(1), short.group(2), f"in {short.group(3)}")
+            continue
+        long = _LONG_LOC.match(line)
+        if long and current.path is None:
+            current.path, current.lineno = long.group(1), long.group(2)
+            current.label = f"({long.group(3)})" if long.group(3) else ""
+            frames.append(current)
+            current = _Frame()
+            continue
+        if line.startswith(">"):
+            current.source.append("> " + line[1:].strip())
+        elif line.startswith("E "):
+            if line[1:].strip() and not any(noise in line for noise in _NOISE):
+                current.errors.append(line[1:])
+        elif current.path and not current.source and line.strip() and not set(line.strip()) <= {"^", "~"}:
+            # Short frames show just the executing line, without a '>' marker
+            current.source.append("> " + line.strip())
+    if current.path or current.source or current.errors:
+        frames.append(current)
+    return frames
+
+def _format_block(title: str, lines: List[str], relevant_files: Optional[set], max_error_lines: int) -> List[str]:
+    out = [title]
+    omitted = 0
+    for frame in _parse_frames(lines):
+        relevant = frame.path is None or _is_relevant(frame.path, relevant_files)
+        if relevant and frame.path:
+            out.append(f"  {frame.path}:{frame.lineno} {frame.label}".rstrip())
+            out.extend(f"    {source}" for source in frame.source)
+        elif not relevant:
+            omitted += 1
+        if frame.errors:
+            if omitted:
+                out.append(f"  [{omitted} frame(s) outside the generated code omitted]")
+                omitted = 0
+            errors = textwrap.dedent("\n".join(frame.errors)).splitlines()
+            if len(errors) > max_error_lines:
+                errors = errors[:max_error_lines] + [f"... ({len(errors) - max_error_lines} more lines)"]
+            out.extend(f"    E {error}" for error in errors)
+    if omitted:
+        out.append(f"  [{omitted} frame(s) outside the generated code omitted]")
+    return out
+
+def _truncate(text: str, token_budget: int) -> str:
+    """Keeps the tail of unparseable output, where pytest puts the errors and the summary line."""
+    lines = [line for line in text.splitlines()
+             if not line.startswith(("platform ", "rootdir:", "plugins:", "cachedir:", "configfile:"))]
+    text = "\n".join(lines)
+    max_chars = token_budget * 4
+    if len(text) <= max_chars:
+        return text
+    return "[output truncated]\n" + text[-max_chars:]
+
+def summarize_failures(output: str, relevant_files: Optional[Iterable[str]] = None, token_budget: int = DEFAULT_PROMPT_BUDGET, max_error_lines: int = 15) -> str:
+    """
+    Compacts pytest output for an LLM prompt.
+
+    Keeps the final summary line, the ids of failing tests, the assertion/exception
+    lines and the failing source lines from frames in `relevant_files` (by basename;
+    by default any relative path, i.e. the workspace). Captured output, session
+    headers, locals and library frames are dropped. Failures are added in order until
+    `token_budget` is used up; the ids of the rest are still listed if they fit.
+    """
+    relevant = {os.path.basename(f) for f in relevant_files} if relevant_files else None
+    section = None
+    blocks = []          # (title, lines)
+    summary_ids = {}     # test name -> "FAILED nodeid"
+    final_line = ""
+    for line in output.splitlines():
+        match = _SECTION.match(line)
+        if match:
+            name = match.group(1)
+            if name in ("FAILURES", "ERRORS", "short test summary info"):
+                section = name
+            else:
+                final_line, section = name, None
+            continue
+        if section in ("FAILURES", "ERRORS"):
+            block = _BLOCK.match(line)
+            if block:
+                blocks.append((block.group(1), []))
+            elif _CAPTURED.match(line):
+                section = section + ":captured"
+            elif blocks:
+                blocks[-1][1].append(line)
+        elif section and section.endswith(":captured"):
+            block = _BLOCK.match(line)
+            if block:
+                section = section.split(":")[0]
+                blocks.append((block.group(1), []))
+        elif section == "short test summary info":
+            match = _SUMMARY_ID.match(line)
+            if match:
+                # Block titles are "test_name" or "TestClass.test_name"
+                parts = match.group(2).split("::")
+                for key in (parts[-1], ".".join(parts[1:])):
+                    summary_ids[key] = f"{match.group(1)} {match.group(2)}"
+
+    if not blocks:
+        return _truncate(output, token_budget)
+
+    header = [final_line] if final_line else []
+    budget = token_budget - estimate_tokens("\n".join(header))
+    body, skipped = [], []
+    for title, lines in blocks:
+        title = summary_ids.get(title, title if title.startswith("ERROR") else f"FAILED {title}")
+        text = "\n".join(_format_block(title, lines, relevant, max_error_lines))
+        cost = estimate_tokens(text)
+        if cost <= budget:
+            body.append(text)
+            budget -= cost
+        elif not body:
+            # Always show at least part of the first failure
+            body.append(text[:max(budget, 0) * 4] + "\n[truncated]")
+            budget = 0
+        else:
+            skipped.append(title)
+    if skipped:
+        listing = "Not shown: " + ", ".join(skipped)
+        if estimate_tokens(listing) > budget:
+            listing = f"[{len(skipped)} more failing tests not shown]"
+        body.append(listing)
+    return "\n".join(header + body)
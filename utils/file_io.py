@@ -12,3 +12,25 @@ def read_file(filepath: str) -> str:
         raise FileNotFoundError(f"File not found: {filepath}")
     with open(filepath, "r", encoding="utf-8") as f:
         return f.read()
+
+class StreamingFileWriter:
+    """Writes content to a file piece by piece while it is still being generated."""
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.bytes_written = 0
+        self._file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        self._file = open(self.filepath, "w", encoding="utf-8")
+        return self
+
+    def write(self, text: str):
+        self._file.write(text)
+        self._file.flush()
+        self.bytes_written += len(text)
+
+    def __exit__(self, *exc):
+        self._file.close()
+        return False
@@ -0,0 +1,127 @@
+import ast
+import copy
+import random
+from typing import List, Optional
+
+# Boundary flips are the subtle kind of wrong comparison (< vs <=), plus == / !=.
+_COMPARE_FLIPS = {
+    ast.Lt: ast.LtE, ast.LtE: ast.Lt,
+    ast.Gt: ast.GtE, ast.GtE: ast.Gt,
+    ast.Eq: ast.NotEq, ast.NotEq: ast.Eq,
+}
+_ARITHMETIC_SWAPS = {ast.Add: ast.Sub, ast.Sub: ast.Add}
+_BOOL_SWAPS = {ast.And: ast.Or, ast.Or: ast.And}
+# Swapping operands only changes the result for non-commutative operators.
+_NON_COMMUTATIVE = (ast.Sub, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+
+class Mutant:
+    def __init__(self, code: str, lineno: int, operator: str, before: str, after: str):
+        self.code = code
+        self.lineno = lineno
+        self.operator = operator
+        self.before = before
+        self.after = after
+
+    @property
+    def description(self) -> str:
+        return f"line {self.lineno}: {self.operator}: `{self.before}` -> `{self.after}`"
+
+def _mutations(node: ast.AST):
+    """Yields (operator name, mutated copy) for every mutation of a single expression node."""
+    if isinstance(node, ast.Compare) and len(node.ops) == 1:
+        flip = _COMPARE_FLIPS.get(type(node.ops[0]))
+        if flip:
+            mutated = copy.deepcopy(node)
+            mutated.ops = [flip()]
+            yield "flipped comparison", mutated
+        if isinstance(node.left, ast.Name) and isinstance(node.comparators[0], ast.Name):
+            mutated = copy.deepcopy(node)
+            mutated.left, mutated.comparators = copy.deepcopy(node.comparators[0]), [copy.deepcopy(node.left)]
+            yield "swapped variables", mutated
+    elif isinstance(node, ast.BinOp):
+        swap = _ARITHMETIC_SWAPS.get(type(node.op))
+        if swap:
+            mutated = copy.deepcopy(node)
+            mutated.op = swap()
+            yield "arithmetic operator", mutated
+        if isinstance(node.op, _NON_COMMUTATIVE) and isinstance(node.left, ast.Name) and isinstance(node.right, ast.Name):
+            mutated = copy.deepcopy(node)
+            mutated.left, mutated.right = node.right, node.left
+            yield "swapped variables", mutated
+    elif isinstance(node, ast.BoolOp):
+        mutated = copy.deepcopy(node)
+        mutated.op = _BOOL_SWAPS[type(node.op)]()
+        yield "boolean operator", mutated
+    elif isinstance(node, ast.Constant) and type(node.value) is int:
+        for delta in (1, -1):
+            yield "off-by-one", ast.Constant(node.value + delta)
+    elif isinstance(node, ast.Call):
+        positional = [arg for arg in node.args if isinstance(arg, ast.Name)]
+        if len(node.args) >= 2 and len(positional) == len(node.args) and node.args[0].id != node.args[1].id:
+            mutated = copy.deepcopy(node)
+            mutated.args[0], mutated.args[1] = node.args[1], node.args[0]
+            yield "swapped variables", mutated
+
+def _splice(lines: List[bytes], node: ast.AST, text: str) -> str:
+    """Replaces the source span of `node` with `text` (ast offsets are UTF-8 byte offsets)."""
+    start, end = node.lineno - 1, node.end_lineno - 1
+    before = lines[start][:node.col_offset]
+    after = lines[end][node.end_col_offset:]
+    return b"".join(lines[:start] + [before + text.encode("utf-8") + after] + lines[end + 1:]).decode("utf-8")
+
+def _mutable_nodes(scope: ast.AST) -> List[ast.AST]:
+    """
+    The nodes of `scope`'s body that may be mutated. Signatures (argument defaults and
+    annotations) and decorators are left alone: the Fixer is held to the original
+    signature, so a bug there could not be fixed.
+    """
+    nodes = [node for statement in scope.body for node in ast.walk(statement)]
+    skip = set()
+    for node in nodes:
+        fixed = []
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            fixed = [node.args, *node.decorator_list] + ([node.returns] if node.returns else [])
+        elif isinstance(node, ast.ClassDef):
+            fixed = node.decorator_list
+        elif isinstance(node, ast.JoinedStr):
+            # Positions inside f-strings are unreliable before Python 3.12
+            fixed = [node]
+        skip.update(id(child) for root in fixed for child in ast.walk(root))
+    return [node for node in nodes if id(node) not in skip]
+
+def generate_mutants(code: str, function_name: Optional[str] = None, seed: int = 0, limit: Optional[int] = None) -> List[Mutant]:
+    """
+    Creates single-point mutants of `code` (restricted to the body of `function_name`
+    when it is defined there) in a seeded random order.
+
+    Only the mutated expression is rewritten, so the rest of the file, comments
+    included, is untouched. Mutants that don't compile or are identical to the
+    original are skipped.
+    """
+    tree = ast.parse(code)
+    scope = tree
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == function_name:
+            scope = node
+            break
+
+    lines = code.encode("utf-8").splitlines(keepends=True)
+    mutants, seen = [], {code}
+    for node in _mutable_nodes(scope):
+        if not hasattr(node, "end_col_offset"):
+            continue
+        original = ast.get_source_segment(code, node)
+        for operator, mutated in _mutations(node):
+            replacement = ast.unparse(mutated)
+            mutant_code = _splice(lines, node, replacement)
+            if mutant_code in seen:
+                continue
+            seen.add(mutant_code)
+            try:
+                compile(mutant_code, "<mutant>", "exec")
+            except SyntaxError:
+                continue
+            mutants.append(Mutant(mutant_code, node.lineno, operator, original, replacement))
+
+    random.Random(seed).shuffle(mutants)
+    return mutants[:limit] if limit else mutants
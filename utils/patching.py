@@ -0,0 +1,72 @@
+import difflib
+from typing import List
+
+from schemas import SearchReplaceEdit
+
+class PatchError(ValueError):
+    """Raised when search/replace edits cannot be applied cleanly."""
+
+def _find_unique(code: str, search: str) -> int:
+    count = code.count(search)
+    if count == 1:
+        return code.index(search)
+    if count > 1:
+        raise PatchError(f"Search block matches {count} times, expected exactly once:\n{search}")
+    return -1
+
+def _find_loose(code: str, search: str):
+    """Matches `search` line by line ignoring trailing whitespace; returns (start, end) offsets or None."""
+    lines = code.splitlines(keepends=True)
+    wanted = [line.rstrip() for line in search.strip("\n").splitlines()]
+    if not wanted:
+        return None
+    stripped = [line.rstrip() for line in lines]
+    matches = [i for i in range(len(lines) - len(wanted) + 1) if stripped[i:i + len(wanted)] == wanted]
+    if len(matches) != 1:
+        if len(matches) > 1:
+            raise PatchError(f"Search block matches {len(matches)} times, expected exactly once:\n{search}")
+        return None
+    start = sum(len(line) for line in lines[:matches[0]])
+    end = start + sum(len(line) for line in lines[matches[0]:matches[0] + len(wanted)])
+    # Keep the original line ending of the last matched line
+    if lines[matches[0] + len(wanted) - 1].endswith("\n"):
+        end -= 1
+    return start, end
+
+def apply_edits(code: str, edits: List[SearchReplaceEdit], filename: str = "<patched>") -> str:
+    """
+    Applies search/replace edits in order and checks the result still compiles.
+
+    Each search block must occur exactly once (exactly, or failing that, ignoring
+    trailing whitespace); anything else raises PatchError.
+    """
+    if not edits:
+        raise PatchError("No edits returned.")
+    for edit in edits:
+        if not edit.search:
+            raise PatchError("Empty search block.")
+        pos = _find_unique(code, edit.search)
+        if pos >= 0:
+            code = code[:pos] + edit.replace + code[pos + len(edit.search):]
+            continue
+        span = _find_loose(code, edit.search)
+        if span is None:
+            raise PatchError(f"Search block not found:\n{edit.search}")
+        replace = edit.replace.strip("\n")
+        code = code[:span[0]] + replace + code[span[1]:]
+    try:
+        compile(code, filename, "exec")
+    except SyntaxError as e:
+        raise PatchError(f"Patched code does not compile: {e}")
+    return code
+
+def diff_to_edits(old: str, new: str, context: int = 1) -> List[SearchReplaceEdit]:
+    """Builds the minimal search/replace edits turning `old` into `new` (one per changed hunk)."""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    edits = []
+    for group in difflib.SequenceMatcher(None, old_lines, new_lines).get_grouped_opcodes(context):
+        i1, i2 = group[0][1], group[-1][2]
+        j1, j2 = group[0][3], group[-1][4]
+        edits.append(SearchReplaceEdit(search="".join(old_lines[i1:i2]), replace="".join(new_lines[j1:j2])))
+    return edits
@@ -0,0 +1,127 @@
+import ast
+import threading
+from typing import List, Optional, Set
+
+def _find_function(tree: ast.Module, name: str):
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == name:
+            return node
+    return None
+
+def function_signature(code: str, function_name: str) -> Optional[str]:
+    """Returns the argument list of a top-level function, e.g. "n, k=2", or None if it can't be found."""
+    try:
+        function = _find_function(ast.parse(code), function_name)
+    except SyntaxError:
+        return None
+    return ast.unparse(function.args) if function else None
+
+def defined_names(tree: ast.Module) -> Set[str]:
+    """Names bound at module level (including inside top-level if/try blocks): functions, classes, assignments and imports."""
+    names = set()
+    pending = list(tree.body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.Import):
+            names.update((alias.asname or alias.name).split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            names.update(alias.asname or alias.name for alias in node.names)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names.update(n.id for target in targets for n in ast.walk(target) if isinstance(n, ast.Name))
+        elif isinstance(node, (ast.If, ast.Try, ast.With)):
+            for field in ("body", "orelse", "finalbody", "handlers"):
+                pending.extend(getattr(node, field, []))
+        elif isinstance(node, ast.ExceptHandler):
+            pending.extend(node.body)
+    return names
+
+def _compile(code: str, filename: str):
+    """Returns (tree, problems); the tree is None if the code does not compile."""
+    try:
+        compile(code, filename, "exec")
+        return ast.parse(code), []
+    except SyntaxError as e:
+        return None, [f"{filename} does not compile: {e.msg} (line {e.lineno})"]
+    except ValueError as e:  # e.g. null bytes
+        return None, [f"{filename} does not compile: {e}"]
+
+class PreflightGate:
+    """
+    Cheap in-process checks on generated files before they cost a pytest run.
+
+    Every rejected file would otherwise have gone through a test run and a Judge /
+    Fixer round-trip just to surface the same problem. Callers report each rejected
+    file they replaced or dropped before testing with `avoided()`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {"checks": 0, "rejected": 0, "cycles_avoided": 0}
+
+    def check_code(self, code: str, function_name: str, filename: str = "<generated>", signature: Optional[str] = None) -> List[str]:
+        """Checks the module compiles and defines `function_name` (with `signature`, if given)."""
+        tree, problems = _compile(code, filename)
+        if tree is not None:
+            function = _find_function(tree, function_name)
+            if function is None:
+                problems.append(f"{filename} does not define a top-level function '{function_name}'")
+            elif signature is not None and ast.unparse(function.args) != signature:
+                problems.append(
+                    f"'{function_name}' signature changed from ({signature}) to ({ast.unparse(function.args)}); keep the original signature"
+                )
+        return self._record(problems)
+
+    def check_tests(self, test_code: str, module_name: str, function_name: str, module_code: Optional[str] = None, filename: str = "<tests>") -> List[str]:
+        """
+        Checks the test file compiles and imports `function_name` from `module_name`.
+        With `module_code`, every name imported from the module must also exist in it.
+        """
+        tree, problems = _compile(test_code, filename)
+        if tree is not None:
+            imported, module_aliases = set(), set()
+            for node in ast.walk(tree):
+                if isinstance(node, ast.ImportFrom) and node.module == module_name and not node.level:
+                    imported.update(alias.name for alias in node.names)
+                elif isinstance(node, ast.Import):
+                    module_aliases.update(alias.asname or alias.name for alias in node.names if alias.name == module_name)
+            if module_aliases:
+                # `import module [as alias]` style: collect the attributes the tests use
+                imported.update(
+                    node.attr for node in ast.walk(tree)
+                    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id in module_aliases
+                )
+            if function_name not in imported and "*" not in imported:
+                problems.append(f"{filename} does not import '{function_name}' from '{module_name}'")
+            if module_code is not None:
+                try:
+                    available = defined_names(ast.parse(module_code))
+                except SyntaxError:
+                    available = None
+                missing = sorted(imported - available - {"*"}) if available is not None else []
+                if missing:
+                    problems.append(
+                        f"{filename} imports {', '.join(missing)} from '{module_name}', which only defines "
+                        f"{', '.join(sorted(n for n in available if not n.startswith('_'))) or 'nothing'}"
+                    )
+        return self._record(problems)
+
+    def _record(self, problems: List[str]) -> List[str]:
+        with self._lock:
+            self.stats["checks"] += 1
+            if problems:
+                self.stats["rejected"] += 1
+        return problems
+
+    def avoided(self):
+        with self._lock:
+            self.stats["cycles_avoided"] += 1
+
+    def summary(self) -> str:
+        s = self.stats
+        return (
+            f"{s['checks']} checks, {s['rejected']} rejected before reaching pytest "
+            f"(~{s['cycles_avoided']} test run + Judge/Fixer cycles avoided)"
+        )
@@ -0,0 +1,90 @@
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional, Sequence
+
+from utils.tracing import get_tracer
+
+class Phase:
+    def __init__(self, name: str, fn: Callable, deps: Sequence[str] = ()):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+
+class PhaseScheduler:
+    """
+    Runs a small dependency graph of phases on a thread pool.
+
+    Each phase is called with the results of its dependencies (in the order they
+    were declared) and starts as soon as all of them have finished, so independent
+    phases overlap. Wall-clock timings are recorded per phase in `timings` as
+    (start, end) offsets in seconds from the start of `run`.
+
+    `run(completed=...)` seeds the results of phases finished in an earlier run;
+    they are skipped. `on_result(name, result, duration)` is called as each phase finishes.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self.phases: Dict[str, Phase] = {}
+        self.results: Dict[str, object] = {}
+        self.timings: Dict[str, tuple] = {}
+        self.wall_time = 0.0
+        self.skipped: List[str] = []
+
+    def add(self, name: str, fn: Callable, deps: Sequence[str] = ()):
+        for dep in deps:
+            if dep not in self.phases:
+                raise ValueError(f"Phase '{name}' depends on unknown phase '{dep}'")
+        self.phases[name] = Phase(name, fn, deps)
+
+    def _run_phase(self, phase: Phase, t0: float):
+        start = time.perf_counter() - t0
+        try:
+            with get_tracer().span(phase.name, kind="phase"):
+                return phase.fn(*[self.results[dep] for dep in phase.deps])
+        finally:
+            self.timings[phase.name] = (start, time.perf_counter() - t0)
+
+    def run(self, completed: Optional[Dict[str, object]] = None, on_result: Optional[Callable] = None) -> Dict[str, object]:
+        t0 = time.perf_counter()
+        completed = {name: result for name, result in (completed or {}).items() if name in self.phases}
+        self.results.update(completed)
+        self.skipped = [name for name in self.phases if name in completed]
+        pending = {name: phase for name, phase in self.phases.items() if name not in completed}
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                ready: List[Phase] = [p for p in pending.values() if all(d in self.results for d in p.deps)]
+                for phase in ready:
+                    del pending[phase.name]
+                    # Copy the caller's context so phase spans nest under the current span.
+                    ctx = contextvars.copy_context()
+                    running[pool.submit(ctx.run, self._run_phase, phase, t0)] = phase.name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self.results[name] = future.result()
+                    except BaseException:
+                        # Let phases already in flight finish, but start nothing new.
+                        for other in running:
+                            other.cancel()
+                        raise
+                    if on_result:
+                        start, end = self.timings[name]
+                        on_result(name, self.results[name], end - start)
+
+        self.wall_time = time.perf_counter() - t0
+        return self.results
+
+    def summary(self) -> List[str]:
+        """Returns one formatted line per phase plus the total, ordered by start time."""
+        lines = []
+        for name, (start, end) in sorted(self.timings.items(), key=lambda item: item[1][0]):
+            lines.append(f"{name:<16} {start:7.2f}s -> {end:7.2f}s  ({end - start:.2f}s)")
+        serial = sum(end - start for start, end in self.timings.values())
+        lines.append(f"{'total':<16} {self.wall_time:.2f}s wall clock ({serial:.2f}s if run serially)")
+        return lines
@@ -0,0 +1,75 @@
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+from schemas import TestRunResult
+
+def suite_key(test_code: str) -> str:
+    """Identifies a version of the test file; outcomes recorded for other versions are ignored."""
+    return hashlib.sha256(test_code.encode("utf-8")).hexdigest()[:16]
+
+class TestRecord:
+    def __init__(self, nodeid: str):
+        self.nodeid = nodeid
+        self.outcome = None
+        self.duration = 0.0
+        self.failures = 0
+        self.runs = 0
+
+class TestIndex:
+    """
+    Per-test outcomes and durations for the current test suite, updated by every run.
+
+    Verification reruns the tests that failed last time first (most frequent
+    failures, then fastest, first) and only runs the rest once those pass. Fix
+    candidates are scored against a snapshot of `failing()` instead of updating it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._suite: Optional[str] = None
+        self._tests: Dict[str, TestRecord] = {}
+        self.stats = {"incremental_runs": 0, "early_stops": 0, "tests_run": 0, "tests_skipped": 0}
+
+    def update(self, suite: str, result: TestRunResult):
+        """Records the outcomes of a run of suite version `suite`; a new version starts a fresh index."""
+        with self._lock:
+            if suite != self._suite:
+                self._suite = suite
+                self._tests = {}
+            for test in result.tests:
+                record = self._tests.setdefault(test.nodeid, TestRecord(test.nodeid))
+                record.outcome = test.outcome
+                record.duration = test.duration
+                record.runs += 1
+                if test.outcome in ("failed", "error"):
+                    record.failures += 1
+
+    def failing(self, suite: str) -> Optional[List[str]]:
+        """
+        Node ids that failed in their last run, most likely to fail again first; None if
+        `suite` has no recorded run to go by.
+        """
+        with self._lock:
+            if suite != self._suite or not self._tests:
+                return None
+            failing = [r for r in self._tests.values() if r.outcome in ("failed", "error")]
+            return [r.nodeid for r in sorted(failing, key=lambda r: (-r.failures, r.duration))]
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._tests)
+
+    def record_incremental(self, ran: int, skipped: int, stopped_early: bool):
+        with self._lock:
+            self.stats["incremental_runs"] += 1
+            self.stats["tests_run"] += ran
+            self.stats["tests_skipped"] += skipped
+            self.stats["early_stops"] += stopped_early
+
+    def summary(self) -> str:
+        s = self.stats
+        return (
+            f"{s['incremental_runs']} incremental runs, {s['tests_run']} tests run, "
+            f"{s['tests_skipped']} skipped after {s['early_stops']} early stops"
+        )
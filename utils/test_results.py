@@ -0,0 +1,67 @@
+import xml.etree.ElementTree as ET
+from typing import List, Optional
+
+from schemas import TestCaseResult, TestRunResult, JudgeOutput
+
+# pytest exit codes (see pytest.ExitCode)
+EXIT_OK = 0
+EXIT_TESTS_FAILED = 1
+EXIT_INTERRUPTED = 2
+EXIT_INTERNAL_ERROR = 3
+EXIT_USAGE_ERROR = 4
+EXIT_NO_TESTS = 5
+
+def parse_junit_xml(xml_text: str) -> List[TestCaseResult]:
+    """Parses a pytest JUnit XML report into per-test outcomes and durations."""
+    results = []
+    root = ET.fromstring(xml_text)
+    for case in root.iter("testcase"):
+        classname = case.get("classname", "")
+        name = case.get("name", "")
+        # classname is the dotted module path (plus class); rebuild a pytest node id from it
+        parts = classname.split(".") if classname else []
+        module_parts = [p for p in parts if not p[:1].isupper()]
+        class_parts = parts[len(module_parts):]
+        nodeid = "/".join(module_parts) + ".py" if module_parts else ""
+        nodeid = "::".join([nodeid] + class_parts + [name]) if nodeid else name
+
+        outcome, message = "passed", None
+        for tag in ("failure", "error", "skipped"):
+            element = case.find(tag)
+            if element is not None:
+                outcome = "failed" if tag == "failure" else tag
+                message = element.get("message") or (element.text or "").strip() or None
+                break
+        results.append(TestCaseResult(
+            nodeid=nodeid,
+            outcome=outcome,
+            duration=float(case.get("time") or 0.0),
+            message=message,
+        ))
+    return results
+
+def judge_results(result: TestRunResult) -> Optional[JudgeOutput]:
+    """
+    Returns a verdict computed locally from structured results, or None when the
+    run is ambiguous (collection errors, crashes, no tests) and needs a closer look.
+    """
+    passed = result.count("passed")
+    failed = result.count("failed")
+    errors = result.count("error")
+    skipped = result.count("skipped")
+
+    if result.exit_code == EXIT_OK and result.tests and not (failed or errors):
+        reason = f"All {passed} tests passed."
+        if skipped:
+            reason = f"All {passed} tests passed ({skipped} skipped)."
+        return JudgeOutput(success=True, reason=reason)
+
+    if result.exit_code == EXIT_TESTS_FAILED and (failed or errors):
+        failing = [t.nodeid for t in result.tests if t.outcome in ("failed", "error")]
+        shown = ", ".join(failing[:5]) + (", ..." if len(failing) > 5 else "")
+        return JudgeOutput(
+            success=False,
+            reason=f"{failed + errors} of {len(result.tests)} tests failed: {shown}",
+        )
+
+    return None
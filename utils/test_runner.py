@@ -0,0 +1,198 @@
+import os
+import sys
+import time
+import atexit
+import shutil
+import signal
+import tempfile
+import importlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from schemas import TestRunResult
+from utils.test_results import parse_junit_xml, EXIT_INTERRUPTED
+
+# Bytecode cache of a warm worker process, kept across its runs (set by `_warm_up`).
+_PYCACHE_PREFIX: Optional[str] = None
+
+def _top_level_names(dist) -> set:
+    """Top-level modules and packages a distribution installs: what pytest marks for assertion rewriting."""
+    names = set()
+    for path in dist.files or []:
+        parts = path.parts
+        if parts and str(path).endswith(".py"):
+            names.add(parts[0][:-3] if len(parts) == 1 else parts[0])
+    return names
+
+def _warm_up():
+    """
+    Pool initializer: pay for importing pytest and its plugins once per worker process.
+
+    Third-party `pytest11` plugins are imported so that their dependencies (often the
+    expensive part, e.g. trio for anyio) stay loaded, and then the plugins' own modules
+    are dropped again. pytest marks those for assertion rewriting and warns about (and
+    cannot rewrite) modules imported before its hook is installed, so each run imports
+    them afresh, as a cold run does.
+    """
+    global _PYCACHE_PREFIX
+    import pytest  # noqa: F401
+    from importlib.metadata import entry_points
+    from _pytest.config import default_plugins
+
+    # Lets runs reuse the assertion-rewritten plugin modules instead of rewriting them each time.
+    _PYCACHE_PREFIX = tempfile.mkdtemp(prefix="pytest_worker_pycache_")
+    atexit.register(shutil.rmtree, _PYCACHE_PREFIX, True)
+
+    for name in default_plugins:
+        try:
+            importlib.import_module(f"_pytest.{name}")
+        except ImportError:
+            pass
+    for plugin in entry_points(group="pytest11"):
+        try:
+            plugin.load()
+        except Exception:
+            pass
+        names = _top_level_names(plugin.dist) if plugin.dist else set()
+        names.add(plugin.module.split(".")[0])
+        for module in list(sys.modules):
+            if module.split(".")[0] in names:
+                del sys.modules[module]
+
+def _ping():
+    return os.getpid()
+
+def _run_pytest_child(work_dir: str, args: List[str], tmp: str, report_path: str) -> int:
+    """Runs pytest in the current process with stdout/stderr redirected into `tmp`."""
+    import pytest
+
+    # Bytecode for the workspace is never reused: the module under test may be rewritten
+    # within the same second with the same size, which a cached .pyc would not notice.
+    # Everything else (e.g. rewritten plugins) is cached for the worker's later runs, in a
+    # private directory removed at exit, so it is written even under PYTHONDONTWRITEBYTECODE.
+    sys.pycache_prefix = _PYCACHE_PREFIX or os.path.join(tmp, "pycache")
+    sys.dont_write_bytecode = False
+    shutil.rmtree(os.path.join(sys.pycache_prefix, work_dir.lstrip(os.sep)), ignore_errors=True)
+    os.chdir(work_dir)
+    sys.path.insert(0, work_dir)
+    importlib.invalidate_caches()
+
+    for fd, name in ((1, "stdout.txt"), (2, "stderr.txt")):
+        handle = os.open(os.path.join(tmp, name), os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+        os.dup2(handle, fd)
+        os.close(handle)
+    try:
+        return int(pytest.main(list(args) + [f"--junitxml={report_path}", "-p", "no:cacheprovider"]))
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+def _purge_modules(work_dir: str):
+    """Drops modules imported from the workspace so the next run re-imports them."""
+    work_dir = os.path.abspath(work_dir)
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if path and os.path.abspath(path).startswith(work_dir + os.sep):
+            del sys.modules[name]
+
+def _wait_child(pid: int, timeout: Optional[float]) -> Optional[int]:
+    """Waits for a forked child and returns its exit code, or kills it and returns None after `timeout` seconds."""
+    if timeout is None:
+        return os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            return os.waitstatus_to_exitcode(status)
+        time.sleep(0.005)
+    os.kill(pid, signal.SIGKILL)
+    os.waitpid(pid, 0)
+    return None
+
+def run_pytest_warm(work_dir: str, args: List[str], timeout: Optional[float] = None) -> dict:
+    """
+    Runs one pytest session inside an already-warm process.
+
+    Where fork is available the session runs in a forked child, so workspace modules
+    are always imported fresh and the warm parent is never polluted, and a session
+    running longer than `timeout` seconds is killed. Elsewhere the session runs
+    in-process after purging previously imported workspace modules (no timeout).
+    """
+    work_dir = os.path.abspath(work_dir)
+    with tempfile.TemporaryDirectory() as tmp:
+        report_path = os.path.join(tmp, "report.xml")
+        start = time.perf_counter()
+
+        if hasattr(os, "fork"):
+            pid = os.fork()
+            if pid == 0:
+                code = 3
+                try:
+                    code = _run_pytest_child(work_dir, args, tmp, report_path)
+                finally:
+                    os._exit(code)
+            exit_code = _wait_child(pid, timeout)
+        else:
+            saved = (os.getcwd(), list(sys.path), os.dup(1), os.dup(2))
+            _purge_modules(work_dir)
+            try:
+                exit_code = _run_pytest_child(work_dir, args, tmp, report_path)
+            finally:
+                os.chdir(saved[0])
+                sys.path[:] = saved[1]
+                os.dup2(saved[2], 1)
+                os.dup2(saved[3], 2)
+                os.close(saved[2])
+                os.close(saved[3])
+                _purge_modules(work_dir)
+
+        duration = time.perf_counter() - start
+        output = ""
+        for name in ("stdout.txt", "stderr.txt"):
+            path = os.path.join(tmp, name)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    output += f.read()
+        if exit_code is None:
+            exit_code = EXIT_INTERRUPTED
+            output += f"\nTimed out after {timeout:.1f}s\n"
+        junit_xml = None
+        if os.path.exists(report_path):
+            with open(report_path, "r", encoding="utf-8") as f:
+                junit_xml = f.read()
+
+    return {"exit_code": exit_code, "output": output, "junit_xml": junit_xml, "duration": duration}
+
+class PytestWorker:
+    """
+    Long-lived, pre-warmed pytest worker processes.
+
+    The workers are spawned once and import pytest and its plugins up front; each
+    `run` then only pays for collecting and executing the workspace's tests.
+    """
+
+    def __init__(self, max_workers: int = 1):
+        self.pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_up,
+        )
+        # Submitting a no-op starts the workers now, overlapping warm-up with the LLM phases.
+        for _ in range(max_workers):
+            self.pool.submit(_ping)
+
+    def submit(self, work_dir: str, args: List[str], timeout: Optional[float] = None):
+        return self.pool.submit(run_pytest_warm, work_dir, list(args), timeout)
+
+    def run(self, work_dir: str, args: List[str], timeout: Optional[float] = None) -> TestRunResult:
+        raw = self.submit(work_dir, args, timeout).result()
+        return TestRunResult(
+            exit_code=raw["exit_code"],
+            output=raw["output"],
+            tests=parse_junit_xml(raw["junit_xml"]) if raw["junit_xml"] else [],
+            duration=raw["duration"],
+        )
+
+    def close(self):
+        self.pool.shutdown(wait=True)
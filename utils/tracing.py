@@ -0,0 +1,194 @@
+import json
+import time
+import uuid
+import random
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from utils.stats import percentile
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+class Span:
+    __slots__ = ("name", "kind", "span_id", "parent_id", "start", "wall_start", "end", "attrs", "error")
+
+    def __init__(self, name: str, kind: str, span_id: int, parent_id: Optional[int], attrs: dict):
+        self.name = name
+        self.kind = kind
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start = time.perf_counter()
+        self.wall_start = time.time()
+        self.end = None
+        self.attrs = attrs
+        self.error = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, key: str, amount: float):
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+class _NullSpan:
+    """Stand-in when tracing is off, so instrumented code never has to check."""
+    name = kind = ""
+    span_id = parent_id = None
+
+    def set(self, **attrs):
+        pass
+
+    def add(self, key: str, amount: float):
+        pass
+
+NULL_SPAN = _NullSpan()
+
+# Span attributes that are summed per kind in the summary table.
+_TOTALS = ("prompt_chars", "response_chars", "tokens", "retries", "rate_limit_wait", "cache_hit")
+# Durations sampled per span name for the p95 column.
+RESERVOIR_SIZE = 512
+
+class _Aggregate:
+    """Running count/total/max of one span name's durations, plus a bounded uniform sample for percentiles."""
+    __slots__ = ("count", "total", "max", "sample")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.sample: List[float] = []
+
+    def add(self, duration: float):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        if len(self.sample) < RESERVOIR_SIZE:
+            self.sample.append(duration)
+        else:
+            # Reservoir sampling: every duration seen so far is kept with equal probability.
+            slot = random.randrange(self.count)
+            if slot < RESERVOIR_SIZE:
+                self.sample[slot] = duration
+
+class Tracer:
+    """
+    Collects spans for phases, LLM calls and subprocesses.
+
+    Finished spans are appended to a JSONL file (if `path` is set) and folded into
+    per-name aggregates for `summary()`: running count/total/max and a sample of at
+    most RESERVOIR_SIZE durations for the p95. Memory stays bounded, so the tracer
+    can stay on for long batch runs.
+
+    Span ids are only unique within one Tracer, and runs append to the same file, so
+    every record carries the tracer's `trace_id`; a span is identified by the pair.
+    """
+
+    def __init__(self, path: Optional[str] = None, enabled: bool = True):
+        self.enabled = enabled
+        self.path = path
+        self.trace_id = uuid.uuid4().hex
+        self._file = open(path, "a", encoding="utf-8") if (enabled and path) else None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._durations: Dict[tuple, _Aggregate] = {}
+        self._totals: Dict[str, Dict[str, float]] = {}
+
+    def start_span(self, name: str, kind: str = "internal", parent=None, **attrs):
+        if not self.enabled:
+            return NULL_SPAN
+        parent = parent if parent is not None else _current_span.get()
+        return Span(name, kind, next(self._ids), getattr(parent, "span_id", None), attrs)
+
+    def end_span(self, span, error: Optional[BaseException] = None):
+        if span is NULL_SPAN:
+            return
+        span.end = time.perf_counter()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "name": span.name,
+            "kind": span.kind,
+            "start": span.wall_start,
+            "duration": round(span.duration, 6),
+            "thread": threading.current_thread().name,
+            **span.attrs,
+        }
+        if span.error:
+            record["error"] = span.error
+        with self._lock:
+            self._durations.setdefault((span.kind, span.name), _Aggregate()).add(span.duration)
+            totals = self._totals.setdefault(span.kind, {})
+            for key in _TOTALS:
+                value = span.attrs.get(key)
+                if isinstance(value, (int, float)):
+                    totals[key] = totals.get(key, 0) + value
+            if self._file:
+                self._file.write(json.dumps(record, default=str) + "\n")
+                self._file.flush()
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attrs):
+        """Times the enclosed block as a child of the current span."""
+        span = self.start_span(name, kind, **attrs)
+        if span is NULL_SPAN:
+            yield span
+            return
+        token = _current_span.set(span)
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span, error)
+
+    def summary(self) -> List[str]:
+        """
+        Formats a table of count/total/mean/p95/max per span name, plus summed attributes
+        per kind. The p95 is computed from the sampled durations.
+        """
+        with self._lock:
+            durations = {key: (agg.count, agg.total, agg.max, list(agg.sample)) for key, agg in self._durations.items()}
+            totals = {kind: dict(values) for kind, values in self._totals.items()}
+        lines = [f"{'kind':<11} {'name':<22} {'count':>5} {'total':>9} {'mean':>8} {'p95':>8} {'max':>8}"]
+        for (kind, name), (count, total, longest, sample) in sorted(durations.items(), key=lambda item: -item[1][1]):
+            lines.append(
+                f"{kind:<11} {name:<22} {count:>5} {total:>8.2f}s {total / count:>7.2f}s "
+                f"{percentile(sample, 95):>7.2f}s {longest:>7.2f}s"
+            )
+        for kind, values in sorted(totals.items()):
+            if values:
+                lines.append(f"{kind} totals: " + ", ".join(
+                    f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}" for key, value in values.items()
+                ))
+        return lines
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+_TRACER = Tracer()
+
+def get_tracer() -> Tracer:
+    return _TRACER
+
+def set_tracer(tracer: Tracer):
+    global _TRACER
+    _TRACER = tracer
+
+def current_span():
+    """Returns the innermost active span, or NULL_SPAN if there is none."""
+    return _current_span.get() or NULL_SPAN